@@ -209,6 +209,20 @@ class ConversationDatabase:
             return msg_module.get_conversation_messages(self.conn, conversation_id, include_rolled_up,
                                                         user_guid=self.user_guid)
 
+    def get_latest_message_id(self, conversation_id: int) -> int:
+        """Get the ID of the most recent message in a conversation."""
+        with self._conn_manager._lock:
+            return msg_module.get_latest_message_id(self.conn, conversation_id,
+                                                    user_guid=self.user_guid)
+
+    def get_conversation_messages_after(self, conversation_id: int,
+                                        last_message_id: int) -> List[Dict]:
+        """Retrieve messages added to a conversation after the given message ID."""
+        with self._conn_manager._lock:
+            return msg_module.get_conversation_messages_after(self.conn, conversation_id,
+                                                              last_message_id,
+                                                              user_guid=self.user_guid)
+
     def mark_messages_as_rolled_up(self, message_ids: List[int]):
         """Mark messages as rolled up."""
         with self._conn_manager._lock:
@@ -99,6 +99,62 @@ def get_conversation_messages(conn: sqlite3.Connection, conversation_id: int,
     return messages
 
 
+def get_latest_message_id(conn: sqlite3.Connection, conversation_id: int,
+                          user_guid: str = None) -> int:
+    """
+    Get the ID of the most recent message in a conversation.
+
+    Args:
+        conn: Database connection
+        conversation_id: ID of the conversation
+        user_guid: User GUID for multi-user support
+
+    Returns:
+        Latest message ID, or 0 if the conversation has no messages
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT MAX(id) AS last_id
+        FROM messages
+        WHERE conversation_id = ? AND user_guid = ?
+    ''', (conversation_id, user_guid))
+
+    row = cursor.fetchone()
+    return row['last_id'] or 0
+
+
+def get_conversation_messages_after(conn: sqlite3.Connection, conversation_id: int,
+                                    last_message_id: int, user_guid: str = None) -> List[Dict]:
+    """
+    Retrieve messages added to a conversation after a given message ID.
+
+    Message IDs are monotonically increasing, so this returns only the delta
+    since the caller last looked rather than the full conversation.
+
+    Args:
+        conn: Database connection
+        conversation_id: ID of the conversation
+        last_message_id: ID of the last message already seen (0 for all)
+        user_guid: User GUID for multi-user support
+
+    Returns:
+        List of message dictionaries ordered by ID
+    """
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT id, role, content
+        FROM messages
+        WHERE conversation_id = ? AND id > ? AND user_guid = ? AND is_rolled_up = 0
+        ORDER BY id ASC
+    ''', (conversation_id, last_message_id, user_guid))
+
+    return [
+        {'id': row['id'], 'role': row['role'], 'content': row['content']}
+        for row in cursor.fetchall()
+    ]
+
+
 def mark_messages_as_rolled_up(conn: sqlite3.Connection, message_ids: List[int],
                                 user_guid: str = None):
     """
@@ -366,9 +366,15 @@ def _create_indices(conn: sqlite3.Connection):
     cursor = conn.cursor()
 
     # Messages indices
+    # (conversation_id, id) also serves lookups by conversation_id alone, so it
+    # replaces the single-column index created by earlier versions
     cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_messages_conversation
-        ON messages(conversation_id)
+        CREATE INDEX IF NOT EXISTS idx_messages_conversation_id
+        ON messages(conversation_id, id)
+    ''')
+
+    cursor.execute('''
+        DROP INDEX IF EXISTS idx_messages_conversation
     ''')
 
     cursor.execute('''
@@ -6,14 +6,150 @@ supporting text generation and function/tool calling capabilities.
 """
 
 import base64
+import hashlib
+import itertools
 import json
 import logging
 import os
+import threading
 import time
-from typing import List, Dict, Optional, Any
+from collections import OrderedDict
+from typing import List, Dict, Iterator, Optional, Any
 
 from .base import LLMService
 
+# How long (in seconds) a model list fetched from the API is reused
+_MODELS_CACHE_TTL = 300
+
+# Converted Gemini tool lists, keyed by a digest of the canonical tool definitions
+_MAX_CACHED_TOOL_SETS = 64
+_tool_cache: "OrderedDict[bytes, List[Any]]" = OrderedDict()
+_tool_cache_lock = threading.Lock()
+
+
+def _canonical_system_instruction(system: str) -> str:
+    """
+    Normalise a system instruction into the exact string sent to Gemini.
+
+    Trailing whitespace is stripped from each line and from the end of the
+    instruction. Gemini's implicit context cache only matches byte-identical
+    prefixes, so whitespace drift between turns would otherwise cause a cache
+    miss.
+
+    Args:
+        system: System instruction text
+
+    Returns:
+        Canonical system instruction
+    """
+    return '\n'.join(line.rstrip() for line in system.splitlines()).rstrip()
+
+
+def _text_block_to_part(block, parts, tool_id_to_name):
+    """Convert a text block to a Gemini text part."""
+    parts.append({'text': block.get('text', '')})
+
+
+def _tool_use_block_to_part(block, parts, tool_id_to_name):
+    """Convert a tool_use block to a Gemini function call part."""
+    part_data = {
+        'function_call': {
+            'name': block.get('name', ''),
+            'args': block.get('input', {})
+        }
+    }
+    # Include thought signature if present (required for Gemini 3.x)
+    # Decode from base64 string back to bytes
+    sig = block.get('thought_signature')
+    if sig:
+        if isinstance(sig, str):
+            try:
+                part_data['thought_signature'] = base64.b64decode(sig)
+            except Exception:
+                part_data['thought_signature'] = sig.encode('utf-8')
+        else:
+            part_data['thought_signature'] = sig
+    parts.append(part_data)
+
+
+def _tool_result_block_to_part(block, parts, tool_id_to_name):
+    """Convert a tool_result block to a Gemini function response part."""
+    result_content = block.get('content', '')
+    if isinstance(result_content, list):
+        # Extract text from content blocks
+        result_text = ''
+        for item in result_content:
+            if isinstance(item, dict) and item.get('type') == 'text':
+                result_text += item.get('text', '')
+            elif isinstance(item, str):
+                result_text += item
+        result_content = result_text
+
+    # Get function name from tool_use_id mapping
+    tool_use_id = block.get('tool_use_id', '')
+    function_name = tool_id_to_name.get(tool_use_id, tool_use_id)
+
+    parts.append({
+        'function_response': {
+            'name': function_name,
+            'response': {'result': str(result_content)}
+        }
+    })
+
+
+def _skip_provider_block(block, parts, tool_id_to_name):
+    """Skip Anthropic-specific blocks - not supported by Gemini."""
+    logging.debug(f"Skipping Anthropic-specific block type: {block.get('type')}")
+
+
+# Content block type -> handler appending the equivalent Gemini part(s).
+# Handlers take (block, parts, tool_id_to_name); block types without a
+# handler are ignored.
+_BLOCK_HANDLERS = {
+    'text': _text_block_to_part,
+    'tool_use': _tool_use_block_to_part,
+    'tool_result': _tool_result_block_to_part,
+    'server_tool_use': _skip_provider_block,
+    'web_search_tool_result': _skip_provider_block,
+}
+
+
+def _part_to_blocks(part) -> Iterator[Dict[str, Any]]:
+    """
+    Convert a Gemini response part to standard content blocks.
+
+    Args:
+        part: Response part (SDK Part or compatible object)
+
+    Yields:
+        A text block for non-empty text, then a tool_use block for a
+        function call; nothing for parts with neither
+    """
+    # Text content
+    text = getattr(part, 'text', None)
+    if text:
+        yield {'type': 'text', 'text': text}
+
+    # Function call
+    fc = getattr(part, 'function_call', None)
+    if fc:
+        tool_block = {
+            'type': 'tool_use',
+            'id': f"call_{hash(fc.name) % 10000:04d}_{int(time.time() * 1000) % 10000:04d}",
+            'name': fc.name,
+            'input': dict(fc.args) if hasattr(fc.args, 'items') else fc.args
+        }
+        # Capture thought signature if present (required for Gemini 3.x models)
+        # Encode as base64 string for JSON serialization
+        sig = getattr(part, 'thought_signature', None)
+        if sig:
+            if isinstance(sig, bytes):
+                tool_block['thought_signature'] = base64.b64encode(sig).decode('utf-8')
+            else:
+                tool_block['thought_signature'] = str(sig)
+            logging.debug(f"Captured thought_signature for function call: {fc.name}")
+        yield tool_block
+
 
 class GoogleGeminiService(LLMService):
     """Google Gemini API service provider."""
@@ -65,6 +201,9 @@ class GoogleGeminiService(LLMService):
         self.rate_limit_base_delay = rate_limit_base_delay
         self.current_model_id = None
 
+        # (monotonic fetch time, models) from the last successful model listing
+        self._models_cache: Optional[tuple] = None
+
         # Initialise the Google GenAI client
         try:
             from google import genai
@@ -127,9 +266,17 @@ class GoogleGeminiService(LLMService):
         """
         List all available Gemini models.
 
+        Models fetched from the API are cached for _MODELS_CACHE_TTL seconds,
+        so repeated lookups (e.g. model selection after listing) do not each
+        make a round-trip.
+
         Returns:
             List of model dictionaries
         """
+        cached = self._models_cache
+        if cached is not None and time.monotonic() - cached[0] < _MODELS_CACHE_TTL:
+            return cached[1]
+
         models = []
 
         try:
@@ -164,6 +311,7 @@ class GoogleGeminiService(LLMService):
                 })
 
             logging.info(f"Found {len(models)} Google Gemini models from API")
+            self._models_cache = (time.monotonic(), models)
 
         except Exception as e:
             logging.warning(f"Failed to list models from API: {e}")
@@ -362,6 +510,43 @@ class GoogleGeminiService(LLMService):
         """
         Convert tools from standard format to Gemini's function declaration format.
 
+        Tool definitions rarely change within a session, so converted tools are
+        cached by a digest of the canonical tool definitions and the same Tool
+        objects are returned for identical definitions.
+
+        Args:
+            tools: List of tool definitions in standard format
+
+        Returns:
+            List of Gemini Tool objects
+        """
+        key = hashlib.blake2b(
+            json.dumps(tools, sort_keys=True, default=str).encode('utf-8'),
+            digest_size=16
+        ).digest()
+
+        with _tool_cache_lock:
+            gemini_tools = _tool_cache.get(key)
+            if gemini_tools is not None:
+                _tool_cache.move_to_end(key)
+                return list(gemini_tools)
+
+        gemini_tools = self._build_gemini_tools(tools)
+
+        with _tool_cache_lock:
+            _tool_cache[key] = gemini_tools
+            if len(_tool_cache) > _MAX_CACHED_TOOL_SETS:
+                _tool_cache.popitem(last=False)
+
+        return list(gemini_tools)
+
+    def _build_gemini_tools(
+        self,
+        tools: List[Dict[str, Any]]
+    ) -> List[Any]:
+        """
+        Build Gemini Tool objects from tool definitions in standard format.
+
         Args:
             tools: List of tool definitions in standard format
 
@@ -424,6 +609,10 @@ class GoogleGeminiService(LLMService):
         Handles cross-provider compatibility by skipping provider-specific blocks
         (e.g., Anthropic's server_tool_use, web_search_tool_result).
 
+        The system prompt is returned in canonical form (see
+        _canonical_system_instruction) so that identical prompts are sent
+        byte-for-byte identically on every turn.
+
         Args:
             messages: List of messages in standard format
             system: Optional system prompt
@@ -448,93 +637,70 @@ class GoogleGeminiService(LLMService):
                             tool_id_to_name[tool_id] = tool_name
 
         for msg in messages:
-            role = msg.get('role', 'user')
-            content = msg.get('content', '')
+            entry = self._convert_message_to_gemini_format(msg, tool_id_to_name)
+            if entry is not None:
+                contents.append(entry)
 
-            # Map roles
-            if role == 'assistant':
-                gemini_role = 'model'
-            elif role == 'user':
-                gemini_role = 'user'
-            else:
-                gemini_role = 'user'  # Default to user for unknown roles
-
-            # Handle different content types
-            if isinstance(content, str):
-                contents.append({
-                    'role': gemini_role,
-                    'parts': [{'text': content}]
-                })
-            elif isinstance(content, list):
-                # Handle content blocks (text, tool_use, tool_result)
-                parts = []
-                for block in content:
-                    if isinstance(block, dict):
-                        block_type = block.get('type', '')
-
-                        if block_type == 'text':
-                            parts.append({'text': block.get('text', '')})
-
-                        elif block_type == 'tool_use':
-                            # Convert to Gemini function call format
-                            part_data = {
-                                'function_call': {
-                                    'name': block.get('name', ''),
-                                    'args': block.get('input', {})
-                                }
-                            }
-                            # Include thought signature if present (required for Gemini 3.x)
-                            # Decode from base64 string back to bytes
-                            if 'thought_signature' in block and block['thought_signature']:
-                                sig = block['thought_signature']
-                                if isinstance(sig, str):
-                                    try:
-                                        part_data['thought_signature'] = base64.b64decode(sig)
-                                    except Exception:
-                                        part_data['thought_signature'] = sig.encode('utf-8')
-                                else:
-                                    part_data['thought_signature'] = sig
-                            parts.append(part_data)
-
-                        elif block_type == 'tool_result':
-                            # Convert to Gemini function response format
-                            result_content = block.get('content', '')
-                            if isinstance(result_content, list):
-                                # Extract text from content blocks
-                                result_text = ''
-                                for item in result_content:
-                                    if isinstance(item, dict) and item.get('type') == 'text':
-                                        result_text += item.get('text', '')
-                                    elif isinstance(item, str):
-                                        result_text += item
-                                result_content = result_text
-
-                            # Get function name from tool_use_id mapping
-                            tool_use_id = block.get('tool_use_id', '')
-                            function_name = tool_id_to_name.get(tool_use_id, tool_use_id)
-
-                            parts.append({
-                                'function_response': {
-                                    'name': function_name,
-                                    'response': {'result': str(result_content)}
-                                }
-                            })
-
-                        elif block_type in ('server_tool_use', 'web_search_tool_result'):
-                            # Skip Anthropic-specific blocks - not supported by Gemini
-                            logging.debug(f"Skipping Anthropic-specific block type: {block_type}")
-
-                    elif isinstance(block, str):
-                        parts.append({'text': block})
-
-                if parts:
-                    contents.append({
-                        'role': gemini_role,
-                        'parts': parts
-                    })
+        if system:
+            system = _canonical_system_instruction(system)
 
         return contents, system
 
+    def _convert_message_to_gemini_format(
+        self,
+        msg: Dict[str, Any],
+        tool_id_to_name: Dict[str, str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Convert a single message to Gemini's content format.
+
+        Args:
+            msg: Message in standard format
+            tool_id_to_name: Mapping of tool_use IDs to function names
+
+        Returns:
+            Gemini content dict, or None if the message has no parts
+        """
+        role = msg.get('role', 'user')
+        content = msg.get('content', '')
+
+        # Map roles
+        if role == 'assistant':
+            gemini_role = 'model'
+        elif role == 'user':
+            gemini_role = 'user'
+        else:
+            gemini_role = 'user'  # Default to user for unknown roles
+
+        # Handle different content types
+        if isinstance(content, str):
+            return {
+                'role': gemini_role,
+                'parts': [{'text': content}]
+            }
+
+        if not isinstance(content, list):
+            return None
+
+        # Handle content blocks (text, tool_use, tool_result)
+        parts = []
+        for block in content:
+            if isinstance(block, dict):
+                handler = _BLOCK_HANDLERS.get(block.get('type', ''))
+                if handler is not None:
+                    handler(block, parts, tool_id_to_name)
+
+            elif isinstance(block, str):
+                parts.append({'text': block})
+
+        if not parts:
+            return None
+
+        return {
+            'role': gemini_role,
+            'parts': parts
+        }
+
     def _build_web_search_tool(
         self,
         web_search_config: Dict[str, Any]
@@ -611,6 +777,83 @@ class GoogleGeminiService(LLMService):
         """
         return self._is_web_search_supported()
 
+    def _build_request(
+        self,
+        messages: List[Dict[str, Any]],
+        max_tokens: int,
+        temperature: float,
+        tools: Optional[List[Dict[str, Any]]],
+        system: Optional[str],
+        web_search_config: Optional[Dict[str, Any]]
+    ) -> tuple:
+        """
+        Build the contents and generation config for a Gemini request.
+
+        Args:
+            messages: Conversation messages
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            tools: Optional tool definitions
+            system: Optional system prompt
+            web_search_config: Optional web search (grounding) configuration
+
+        Returns:
+            Tuple of (contents list, GenerateContentConfig)
+        """
+        from google.genai import types
+
+        # Convert messages to Gemini format
+        contents, system_instruction = self._convert_messages_to_gemini_format(
+            messages, system
+        )
+
+        # Build generation config
+        model_max = self.get_model_max_tokens(self.current_model_id)
+        actual_max_tokens = min(max_tokens, model_max) if max_tokens else self.default_max_tokens
+
+        generation_config = types.GenerateContentConfig(
+            temperature=temperature,
+            max_output_tokens=actual_max_tokens
+        )
+
+        # Add system instruction if provided
+        if system_instruction:
+            generation_config.system_instruction = system_instruction
+
+        # Build tools list
+        # NOTE: Google's API does NOT allow combining Google Search grounding
+        # with function calling tools - they are mutually exclusive.
+        # When web search is enabled, we use ONLY the search tool.
+        all_tools = []
+        web_search_active = False
+
+        # Add web search (grounding) tool if enabled
+        if web_search_config and web_search_config.get('enabled'):
+            web_search_tool = self._build_web_search_tool(web_search_config)
+            if web_search_tool:
+                all_tools.append(web_search_tool)
+                web_search_active = True
+                logging.info("Google Search grounding enabled for this request (function calling disabled)")
+
+        # Add regular tools if provided - but NOT if web search is active
+        # Google's API returns "Tool use with function calling is unsupported"
+        # when combining grounding with function declarations
+        if tools and not web_search_active:
+            gemini_tools = self._convert_tools_to_gemini_format(tools)
+            all_tools.extend(gemini_tools)
+
+        # Set tools in config
+        if all_tools:
+            generation_config.tools = all_tools
+
+        return contents, generation_config
+
+    @staticmethod
+    def _is_rate_limit_error(error: Exception) -> bool:
+        """Check whether an API error indicates a rate limit or quota failure."""
+        error_str = str(error).lower()
+        return 'rate' in error_str or 'quota' in error_str or '429' in error_str
+
     def invoke_model(
         self,
         messages: List[Dict[str, Any]],
@@ -646,52 +889,11 @@ class GoogleGeminiService(LLMService):
             }
 
         try:
-            from google.genai import types
-
-            # Convert messages to Gemini format
-            contents, system_instruction = self._convert_messages_to_gemini_format(
-                messages, system
+            contents, generation_config = self._build_request(
+                messages, max_tokens, temperature, tools, system,
+                web_search_config
             )
 
-            # Build generation config
-            model_max = self.get_model_max_tokens(self.current_model_id)
-            actual_max_tokens = min(max_tokens, model_max) if max_tokens else self.default_max_tokens
-
-            generation_config = types.GenerateContentConfig(
-                temperature=temperature,
-                max_output_tokens=actual_max_tokens
-            )
-
-            # Add system instruction if provided
-            if system_instruction:
-                generation_config.system_instruction = system_instruction
-
-            # Build tools list
-            # NOTE: Google's API does NOT allow combining Google Search grounding
-            # with function calling tools - they are mutually exclusive.
-            # When web search is enabled, we use ONLY the search tool.
-            all_tools = []
-            web_search_active = False
-
-            # Add web search (grounding) tool if enabled
-            if web_search_config and web_search_config.get('enabled'):
-                web_search_tool = self._build_web_search_tool(web_search_config)
-                if web_search_tool:
-                    all_tools.append(web_search_tool)
-                    web_search_active = True
-                    logging.info("Google Search grounding enabled for this request (function calling disabled)")
-
-            # Add regular tools if provided - but NOT if web search is active
-            # Google's API returns "Tool use with function calling is unsupported"
-            # when combining grounding with function declarations
-            if tools and not web_search_active:
-                gemini_tools = self._convert_tools_to_gemini_format(tools)
-                all_tools.extend(gemini_tools)
-
-            # Set tools in config
-            if all_tools:
-                generation_config.tools = all_tools
-
             # Make API call with retry logic
             response = None
             last_error = None
@@ -706,11 +908,10 @@ class GoogleGeminiService(LLMService):
                     break  # Success, exit retry loop
 
                 except Exception as e:
-                    error_str = str(e).lower()
                     last_error = e
 
                     # Check for rate limit errors
-                    if 'rate' in error_str or 'quota' in error_str or '429' in error_str:
+                    if self._is_rate_limit_error(e):
                         if retry_attempt < self.rate_limit_max_retries - 1:
                             wait_time = self.rate_limit_base_delay ** retry_attempt
                             logging.warning(
@@ -743,6 +944,136 @@ class GoogleGeminiService(LLMService):
                 'error_type': 'APIError'
             }
 
+    def invoke_model_stream(
+        self,
+        messages: List[Dict[str, Any]],
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        system: Optional[str] = None,
+        web_search_config: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Invoke the Gemini model and stream the response as it is generated.
+
+        Yields {'delta': text} for each piece of generated text, followed by a
+        single {'response': ...} containing the complete response in the same
+        standard format as invoke_model() (with usage from the final chunk).
+        If the request fails, an error dictionary is yielded and the stream ends.
+
+        Args:
+            messages: Conversation messages
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            tools: Optional tool definitions
+            system: Optional system prompt
+            web_search_config: Optional web search (grounding) configuration
+
+        Yields:
+            Text delta dictionaries, then the final response dictionary
+        """
+        if not self.current_model_id:
+            yield {
+                'error': True,
+                'error_code': 'NoModelSelected',
+                'error_message': 'No model selected. Call set_model() first.',
+                'error_type': 'ConfigurationError'
+            }
+            return
+
+        try:
+            contents, generation_config = self._build_request(
+                messages, max_tokens, temperature, tools, system,
+                web_search_config
+            )
+
+            # The request is sent when the first chunk is read, so rate limit
+            # retries cover starting the stream but not failures part way through
+            stream = None
+            first_chunk = None
+            last_error = None
+
+            for retry_attempt in range(self.rate_limit_max_retries):
+                try:
+                    stream = iter(self.client.models.generate_content_stream(
+                        model=self.current_model_id,
+                        contents=contents,
+                        config=generation_config
+                    ))
+                    first_chunk = next(stream, None)
+                    break
+
+                except Exception as e:
+                    last_error = e
+                    stream = None
+
+                    if self._is_rate_limit_error(e):
+                        if retry_attempt < self.rate_limit_max_retries - 1:
+                            wait_time = self.rate_limit_base_delay ** retry_attempt
+                            logging.warning(
+                                f"Rate limit hit, waiting {wait_time:.1f}s "
+                                f"(attempt {retry_attempt + 1}/{self.rate_limit_max_retries})"
+                            )
+                            time.sleep(wait_time)
+                            continue
+
+                    raise
+
+            if stream is None:
+                yield {
+                    'error': True,
+                    'error_code': 'RateLimitExceeded',
+                    'error_message': f'Rate limit exceeded after {self.rate_limit_max_retries} retries: {last_error}',
+                    'error_type': 'RetryError'
+                }
+                return
+
+            text_parts = []
+            content_blocks = []
+            chunk_result = None
+
+            chunks = itertools.chain((first_chunk,), stream) if first_chunk is not None else ()
+            for chunk in chunks:
+                chunk_result = self._process_response(chunk)
+
+                if chunk_result['content']:
+                    text_parts.append(chunk_result['content'])
+                    yield {'delta': chunk_result['content']}
+
+                for block in chunk_result['content_blocks']:
+                    # Merge consecutive text deltas into a single text block
+                    if block['type'] == 'text' and content_blocks and content_blocks[-1]['type'] == 'text':
+                        content_blocks[-1]['text'] += block['text']
+                    else:
+                        content_blocks.append(dict(block))
+
+            result = {
+                'content': ''.join(text_parts),
+                'content_blocks': content_blocks,
+                'stop_reason': chunk_result['stop_reason'] if chunk_result else 'end_turn',
+                'usage': chunk_result['usage'] if chunk_result else {'input_tokens': 0, 'output_tokens': 0}
+            }
+
+            tool_use_blocks = [block for block in content_blocks if block['type'] == 'tool_use']
+            if tool_use_blocks:
+                result['tool_use'] = tool_use_blocks
+                result['stop_reason'] = 'tool_use'
+
+            if chunk_result and chunk_result.get('grounding_metadata'):
+                result['grounding_metadata'] = chunk_result['grounding_metadata']
+
+            yield {'response': result}
+
+        except Exception as e:
+            logging.error(f"Google Gemini API error: {e}")
+            yield {
+                'error': True,
+                'error_code': 'GoogleGeminiError',
+                'error_message': str(e),
+                'error_type': 'APIError'
+            }
+
     def _process_response(self, response) -> Dict[str, Any]:
         """
         Process the Gemini API response into standard format.
@@ -765,20 +1096,27 @@ class GoogleGeminiService(LLMService):
             'output_tokens': 0
         }
 
-        if hasattr(response, 'usage_metadata'):
-            usage = response.usage_metadata
-            if hasattr(usage, 'prompt_token_count'):
-                usage_info['input_tokens'] = usage.prompt_token_count
-            if hasattr(usage, 'candidates_token_count'):
-                usage_info['output_tokens'] = usage.candidates_token_count
+        # Each attribute is read once with getattr(); the SDK response types are
+        # pydantic models, so this is cheaper than dumping the whole response
+        # to a dict first.
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            prompt_tokens = getattr(usage, 'prompt_token_count', None)
+            if prompt_tokens is not None:
+                usage_info['input_tokens'] = prompt_tokens
+            output_tokens = getattr(usage, 'candidates_token_count', None)
+            if output_tokens is not None:
+                usage_info['output_tokens'] = output_tokens
 
         # Process candidates
-        if hasattr(response, 'candidates') and response.candidates:
-            candidate = response.candidates[0]
+        candidates = getattr(response, 'candidates', None)
+        if candidates:
+            candidate = candidates[0]
 
             # Get finish reason
-            if hasattr(candidate, 'finish_reason'):
-                finish_reason = str(candidate.finish_reason).lower()
+            finish_reason = getattr(candidate, 'finish_reason', None)
+            if finish_reason is not None:
+                finish_reason = str(finish_reason).lower()
                 if 'stop' in finish_reason:
                     stop_reason = 'end_turn'
                 elif 'max_tokens' in finish_reason or 'length' in finish_reason:
@@ -787,41 +1125,17 @@ class GoogleGeminiService(LLMService):
                     stop_reason = 'safety'
 
             # Process content parts
-            if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                for part in candidate.content.parts:
-                    # Text content
-                    if hasattr(part, 'text') and part.text:
-                        text_parts.append(part.text)
-                        content_blocks.append({
-                            'type': 'text',
-                            'text': part.text
-                        })
-
-                    # Function call
-                    if hasattr(part, 'function_call') and part.function_call:
-                        fc = part.function_call
-                        tool_block = {
-                            'type': 'tool_use',
-                            'id': f"call_{hash(fc.name) % 10000:04d}_{int(time.time() * 1000) % 10000:04d}",
-                            'name': fc.name,
-                            'input': dict(fc.args) if hasattr(fc.args, 'items') else fc.args
-                        }
-                        # Capture thought signature if present (required for Gemini 3.x models)
-                        # Encode as base64 string for JSON serialization
-                        if hasattr(part, 'thought_signature') and part.thought_signature:
-                            sig = part.thought_signature
-                            if isinstance(sig, bytes):
-                                tool_block['thought_signature'] = base64.b64encode(sig).decode('utf-8')
-                            else:
-                                tool_block['thought_signature'] = str(sig)
-                            logging.debug(f"Captured thought_signature for function call: {fc.name}")
-                        tool_use_blocks.append(tool_block)
-                        content_blocks.append(tool_block)
-                        stop_reason = 'tool_use'
+            parts = getattr(getattr(candidate, 'content', None), 'parts', None) or ()
+            content_blocks = [block for part in parts for block in _part_to_blocks(part)]
+            tool_use_blocks = [block for block in content_blocks if block['type'] == 'tool_use']
+            text_parts = [block['text'] for block in content_blocks if block['type'] == 'text']
+            if tool_use_blocks:
+                stop_reason = 'tool_use'
 
             # Extract grounding metadata (web search results)
-            if hasattr(candidate, 'grounding_metadata') and candidate.grounding_metadata:
-                grounding_metadata = self._extract_grounding_metadata(candidate.grounding_metadata)
+            candidate_grounding = getattr(candidate, 'grounding_metadata', None)
+            if candidate_grounding:
+                grounding_metadata = self._extract_grounding_metadata(candidate_grounding)
 
         # Build response
         result = {
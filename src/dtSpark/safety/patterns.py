@@ -12,7 +12,24 @@ This module contains regex patterns and keyword lists for detecting:
 """
 
 import re
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, Iterable, List, Tuple, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# Patterns must be written in lower case. ASCII text is lower-cased and
+# matched case-sensitively, which lets re use its fast literal-prefix search
+# (it cannot for IGNORECASE patterns) and gives the same matches. Neither
+# str.lower() nor str.casefold() reproduces IGNORECASE on non-ASCII text
+# ('\u0130' and '\u0131' both match 'i', and '\u017f' matches 's'), so
+# non-ASCII text is searched as-is with the IGNORECASE patterns.
 
 # Prompt injection patterns - attempts to override system instructions
 PROMPT_INJECTION_PATTERNS = [
@@ -23,13 +40,13 @@ PROMPT_INJECTION_PATTERNS = [
     r'system:\s*(you\s+)?(are|must|should|will)\s+now',
     r'override\s+(previous|all|system)\s+(instructions?|settings?|rules?)',
     r'</s>|<\|im_end\|>|<\|endoftext\|>|<\|system\|>',  # Model control tokens
-    r'\[INST\]|\[/INST\]',  # Instruction markers
+    r'\[inst\]|\[/inst\]',  # Instruction markers
     r'<\|assistant\|>|<\|user\|>',  # Role markers
 ]
 
 # Jailbreak patterns - attempts to bypass safety guidelines
 JAILBREAK_PATTERNS = [
-    r'\b(DAN|Developer\s+Mode|Sudo\s+Mode|God\s+Mode|Admin\s+Mode)\b',
+    r'\b(dan|developer\s+mode|sudo\s+mode|god\s+mode|admin\s+mode)\b',
     r'pretend\s+you\s+(are|have)\s+no\s+(restrictions?|limitations?|rules?|ethics?|guidelines?)',
     r'roleplay\s+as\s+(an?\s+)?(unrestricted|unfiltered|uncensored)',
     r'act\s+as\s+if\s+you\s+(have\s+)?no\s+(restrictions?|limitations?|rules?)',
@@ -42,8 +59,8 @@ JAILBREAK_PATTERNS = [
 # Code injection patterns - malicious code attempts
 CODE_INJECTION_PATTERNS = [
     r';\s*rm\s+-rf',
-    r';\s*DROP\s+TABLE',
-    r';\s*DELETE\s+FROM',
+    r';\s*drop\s+table',
+    r';\s*delete\s+from',
     r'<script[^>]*>.*?</script>',
     r'\$\([^)]+\)|`[^`]+`',  # Command substitution
     r'\|\s*bash|\|\s*sh|\|\s*zsh',
@@ -58,15 +75,258 @@ CODE_INJECTION_PATTERNS = [
 PII_PATTERNS = [
     r'\b\d{3}-\d{2}-\d{4}\b',  # SSN pattern
     r'\b\d{16}\b',  # Credit card pattern
-    r'\b[A-Z]{2}\d{6,8}\b',  # Passport pattern
+    r'\b[a-z]{2}\d{6,8}\b',  # Passport pattern
     r'\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b',  # IP address
     r'password\s*[:=]\s*\S+',  # Password disclosure
     r'api[_-]?key\s*[:=]\s*\S+',  # API key
     r'secret\s*[:=]\s*\S+',  # Secret disclosure
 ]
 
+# Longest repeated unit the repetition check looks for. An unbounded unit makes
+# the backreference search quadratic in prompt length (tens of seconds for a
+# 50 000 character prompt with no repetition); bounding it keeps the scan linear
+MAX_REPETITION_UNIT = 200
+
 # Excessive repetition pattern
-EXCESSIVE_REPETITION_PATTERN = r'(.{10,}?)\1{5,}'  # Same pattern repeated 5+ times
+EXCESSIVE_REPETITION_PATTERN = r'(.{10,%d}?)\1{5,}' % MAX_REPETITION_UNIT  # Same pattern repeated 5+ times
+
+# Shortest text the repetition pattern can match (a ten-character unit, six times)
+_MIN_REPETITION_SPAN = 60
+
+# Text carried over from one chunk to the next by scan_chunks(), so matches
+# spanning a chunk boundary are still found; covers the longest repetition span
+_CHUNK_OVERLAP = 6 * MAX_REPETITION_UNIT
+
+# Severity of each violation, in the order scan_all() reports them
+_VIOLATION_SEVERITY = {
+    'prompt_injection': 'high',
+    'jailbreak': 'high',
+    'code_injection': 'critical',
+    'pii_exposure': 'medium',
+    'excessive_length': 'medium',
+    'excessive_repetition': 'low',
+}
+
+# Placed between the head and tail of a windowed prompt (see scan_window_head)
+SCAN_WINDOW_SEPARATOR = '\x00\x00'
+
+# Literals, one of which appears in every match of the pattern, for the
+# patterns re cannot find a literal prefix for. Lower-cased ASCII text
+# containing none of them cannot match, so the search is skipped - most
+# prompts contain none. Not applied to non-ASCII text (see above).
+_REQUIRED_LITERALS: Dict[str, Tuple[str, ...]] = {
+    JAILBREAK_PATTERNS[0]: ('dan', 'mode'),
+    CODE_INJECTION_PATTERNS[4]: ('$(', '`'),
+}
+
+# As above; on str, \d also matches non-ASCII digits, so these would not be
+# valid for non-ASCII text either
+_DIGITS = tuple('0123456789')
+_REQUIRED_ASCII_LITERALS: Dict[str, Tuple[str, ...]] = {
+    PII_PATTERNS[0]: _DIGITS,
+    PII_PATTERNS[1]: _DIGITS,
+    PII_PATTERNS[2]: _DIGITS,
+    PII_PATTERNS[3]: _DIGITS,
+}
+
+# ASCII text length from which RE2's linear-time matching beats re's lower per-call overhead
+_RE2_MIN_LENGTH = 1024
+
+# Explicit equivalents of Python's Unicode \s and \S for ASCII text. Python's
+# bytes \s lacks \x1c-\x1f and RE2's \s also lacks \v, so both are spelt out
+_ASCII_WHITESPACE = r'[\t\n\x0b\x0c\r \x1c-\x1f]'
+_ASCII_NON_WHITESPACE = r'[^\t\n\x0b\x0c\r \x1c-\x1f]'
+
+# Text length from which the vectorised repetition check beats the regex
+_VECTORISED_REPETITION_MIN_LENGTH = 2048
+
+
+def _compile_patterns(patterns: List[str]) -> Tuple[re.Pattern, ...]:
+    """Compile a lower-case pattern list once, for matching text of any case."""
+    return tuple(re.compile(p, re.IGNORECASE) for p in patterns)
+
+
+def _has_repeated_unit(text: str, lowered: str) -> Optional[bool]:
+    """
+    Vectorised equivalent of EXCESSIVE_REPETITION_PATTERN.
+
+    For each unit length, compares the text with itself shifted by that
+    length; the pattern matches exactly when the comparison holds, with no
+    newline involved, for five consecutive units.
+
+    Args:
+        text: Text to analyse
+        lowered: text.lower()
+
+    Returns:
+        Whether the text contains a repeated unit, or None if this check
+        cannot decide (numpy unavailable, or lower-casing changed the length)
+    """
+    if np is None or len(lowered) != len(text):
+        return None
+
+    codes = np.frombuffer(lowered.encode('utf-32-le'), dtype=np.uint32)
+    newline = ord('\n')
+    for unit in range(10, min(MAX_REPETITION_UNIT, codes.size // 6) + 1):
+        head = codes[:-unit]
+        same = (head == codes[unit:]) & (head != newline)
+        breaks = np.flatnonzero(~same)
+        if breaks.size == 0:
+            longest = same.size
+        else:
+            longest = max(breaks[0], same.size - 1 - breaks[-1])
+            if breaks.size > 1:
+                longest = max(longest, np.diff(breaks).max() - 1)
+        if longest >= 5 * unit:
+            return True
+    return False
+
+
+def _lowered(text: str, lowered: Optional[str]) -> str:
+    """Return the caller's lower-cased text, lower-casing it here if not supplied."""
+    return text.lower() if lowered is None else lowered
+
+
+def _ascii_pattern(pattern: str) -> str:
+    """
+    Rewrite a pattern's \\s and \\S as explicit classes for matching ASCII text.
+
+    For ASCII text, whitespace is the only class on which Python's Unicode
+    str patterns differ from bytes patterns and from RE2, so the rewritten
+    pattern matches exactly what the str pattern does.
+
+    Args:
+        pattern: Lower-case pattern string
+
+    Returns:
+        Pattern string with explicit whitespace classes
+    """
+    return re.sub(r'\\([sS])',
+                  lambda m: _ASCII_WHITESPACE if m.group(1) == 's' else _ASCII_NON_WHITESPACE,
+                  pattern)
+
+
+def _compile_ascii_pattern(pattern: str) -> re.Pattern:
+    """
+    Compile a lower-case pattern for matching ASCII text as bytes.
+
+    Matching bytes avoids re's Unicode character class lookups.
+
+    Args:
+        pattern: Lower-case pattern string
+
+    Returns:
+        Compiled bytes pattern
+    """
+    return re.compile(_ascii_pattern(pattern).encode('ascii'))
+
+
+def _prefiltered(search: Callable, literals: Tuple) -> Callable:
+    """
+    Wrap a search so it only runs when the text contains one of the given literals.
+
+    Args:
+        search: Bound search method
+        literals: Literals (str or bytes, matching the searched text), one of
+            which appears in every match of the pattern
+
+    Returns:
+        Search method returning None without searching when no literal is present
+    """
+    def prefiltered_search(subject):
+        for literal in literals:
+            if literal in subject:
+                return search(subject)
+        return None
+    return prefiltered_search
+
+
+def _search_methods(patterns: List[str], regexes: Tuple[re.Pattern, ...]) -> Tuple[Tuple[Callable, ...], ...]:
+    """
+    Build the bound search methods used to scan short ASCII, non-ASCII and long ASCII text.
+
+    ASCII text is searched lower-cased, as bytes or (when long and RE2 is
+    installed) with RE2; any pattern RE2 cannot compile keeps using re.
+    Patterns listed in _REQUIRED_LITERALS or _REQUIRED_ASCII_LITERALS are
+    only searched when the ASCII text contains one of their literals.
+    Non-ASCII text is searched in its original case with the IGNORECASE
+    patterns, without prefilters.
+
+    Args:
+        patterns: Lower-case pattern strings
+        regexes: The same patterns compiled with re.IGNORECASE
+
+    Returns:
+        Tuple of (short ASCII bytes searches, non-ASCII text searches, long ASCII text searches)
+    """
+    ascii_searches = []
+    unicode_searches = []
+    long_searches = []
+    for pattern, regex in zip(patterns, regexes):
+        ascii_search = _compile_ascii_pattern(pattern).search
+        long_search = None
+        if re2 is not None:
+            try:
+                long_search = re2.compile(_ascii_pattern(pattern)).search
+            except re2.error:
+                pass
+        if long_search is None:
+            long_search = re.compile(pattern).search
+
+        literals = _REQUIRED_LITERALS.get(pattern) or _REQUIRED_ASCII_LITERALS.get(pattern)
+        if literals:
+            ascii_search = _prefiltered(ascii_search, tuple(literal.encode('ascii') for literal in literals))
+            long_search = _prefiltered(long_search, literals)
+
+        ascii_searches.append(ascii_search)
+        unicode_searches.append(regex.search)
+        long_searches.append(long_search)
+    return tuple(ascii_searches), tuple(unicode_searches), tuple(long_searches)
+
+
+def _first_match(searches: Tuple[Tuple[Callable, ...], ...], text: str, lowered: str) -> Optional[str]:
+    """
+    Return the text matched by the first pattern that matches, if any.
+
+    Args:
+        searches: Search methods from _search_methods()
+        text: Text to analyse, in its original case
+        lowered: text.lower(), computed once per scan by the caller
+
+    Returns:
+        Matched text in its original case, or None if nothing matched
+    """
+    ascii_searches, unicode_searches, long_searches = searches
+    if not text.isascii():
+        subject, searches = text, unicode_searches
+    elif re2 is not None and len(text) >= _RE2_MIN_LENGTH:
+        subject, searches = lowered, long_searches
+    else:
+        # Byte offsets equal character offsets for ASCII text
+        subject, searches = lowered.encode('ascii'), ascii_searches
+
+    for search in searches:
+        match = search(subject)
+        if match:
+            # Lower-casing ASCII text keeps its length, so the offsets hold
+            # for the original text
+            return text[match.start():match.end()]
+    return None
+
+
+# Compiled once at import and shared by every PatternMatcher, so building
+# a PromptInspector does not pay to compile the pattern set again
+_PROMPT_INJECTION_REGEX = _compile_patterns(PROMPT_INJECTION_PATTERNS)
+_JAILBREAK_REGEX = _compile_patterns(JAILBREAK_PATTERNS)
+_CODE_INJECTION_REGEX = _compile_patterns(CODE_INJECTION_PATTERNS)
+_PII_REGEX = _compile_patterns(PII_PATTERNS)
+_REPETITION_REGEX = re.compile(EXCESSIVE_REPETITION_PATTERN, re.IGNORECASE)
+
+# Bound search methods, saving an attribute lookup per pattern per scan
+_PROMPT_INJECTION_SEARCHES = _search_methods(PROMPT_INJECTION_PATTERNS, _PROMPT_INJECTION_REGEX)
+_JAILBREAK_SEARCHES = _search_methods(JAILBREAK_PATTERNS, _JAILBREAK_REGEX)
+_CODE_INJECTION_SEARCHES = _search_methods(CODE_INJECTION_PATTERNS, _CODE_INJECTION_REGEX)
+_PII_SEARCHES = _search_methods(PII_PATTERNS, _PII_REGEX)
 
 
 class PatternMatcher:
@@ -75,97 +335,103 @@ class PatternMatcher:
     """
 
     def __init__(self):
-        """Initialise pattern matcher with compiled regex patterns."""
-        self.prompt_injection_regex = [re.compile(p, re.IGNORECASE) for p in PROMPT_INJECTION_PATTERNS]
-        self.jailbreak_regex = [re.compile(p, re.IGNORECASE) for p in JAILBREAK_PATTERNS]
-        self.code_injection_regex = [re.compile(p, re.IGNORECASE) for p in CODE_INJECTION_PATTERNS]
-        self.pii_regex = [re.compile(p, re.IGNORECASE) for p in PII_PATTERNS]
-        self.repetition_regex = re.compile(EXCESSIVE_REPETITION_PATTERN, re.IGNORECASE)
-
-    def check_prompt_injection(self, text: str) -> Tuple[bool, Optional[str]]:
+        """Initialise pattern matcher with the precompiled regex patterns."""
+        self.prompt_injection_regex = _PROMPT_INJECTION_REGEX
+        self.jailbreak_regex = _JAILBREAK_REGEX
+        self.code_injection_regex = _CODE_INJECTION_REGEX
+        self.pii_regex = _PII_REGEX
+        self.repetition_regex = _REPETITION_REGEX
+
+    def check_prompt_injection(self, text: str, lowered: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Check for prompt injection patterns.
 
         Args:
             text: Text to analyse
+            lowered: Optional text.lower(), if the caller already has it
 
         Returns:
             Tuple of (detected, matched_pattern)
         """
-        for pattern in self.prompt_injection_regex:
-            match = pattern.search(text)
-            if match:
-                return True, match.group(0)
-        return False, None
+        matched = _first_match(_PROMPT_INJECTION_SEARCHES, text, _lowered(text, lowered))
+        return matched is not None, matched
 
-    def check_jailbreak(self, text: str) -> Tuple[bool, Optional[str]]:
+    def check_jailbreak(self, text: str, lowered: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Check for jailbreak attempt patterns.
 
         Args:
             text: Text to analyse
+            lowered: Optional text.lower(), if the caller already has it
 
         Returns:
             Tuple of (detected, matched_pattern)
         """
-        for pattern in self.jailbreak_regex:
-            match = pattern.search(text)
-            if match:
-                return True, match.group(0)
-        return False, None
+        matched = _first_match(_JAILBREAK_SEARCHES, text, _lowered(text, lowered))
+        return matched is not None, matched
 
-    def check_code_injection(self, text: str) -> Tuple[bool, Optional[str]]:
+    def check_code_injection(self, text: str, lowered: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Check for code injection patterns.
 
         Args:
             text: Text to analyse
+            lowered: Optional text.lower(), if the caller already has it
 
         Returns:
             Tuple of (detected, matched_pattern)
         """
-        for pattern in self.code_injection_regex:
-            match = pattern.search(text)
-            if match:
-                return True, match.group(0)
-        return False, None
+        matched = _first_match(_CODE_INJECTION_SEARCHES, text, _lowered(text, lowered))
+        return matched is not None, matched
 
-    def check_pii(self, text: str) -> Tuple[bool, Optional[str]]:
+    def check_pii(self, text: str, lowered: Optional[str] = None) -> Tuple[bool, Optional[str]]:
         """
         Check for potential PII exposure.
 
         Args:
             text: Text to analyse
+            lowered: Optional text.lower(), if the caller already has it
 
         Returns:
             Tuple of (detected, matched_pattern)
         """
-        for pattern in self.pii_regex:
-            match = pattern.search(text)
-            if match:
-                # Return redacted version
-                return True, "[REDACTED]"
+        if _first_match(_PII_SEARCHES, text, _lowered(text, lowered)) is not None:
+            # Return redacted version
+            return True, "[REDACTED]"
         return False, None
 
-    def check_excessive_repetition(self, text: str) -> bool:
+    def check_excessive_repetition(self, text: str, lowered: Optional[str] = None) -> bool:
         """
         Check for excessive repetition (potential DoS).
 
         Args:
             text: Text to analyse
+            lowered: Optional text.lower(), if the caller already has it
 
         Returns:
             True if excessive repetition detected
         """
+        # A run of one character covering six ten-character units always
+        # matches, and is the usual shape of padding; avoid the regex for it.
+        # Newlines are excluded: the pattern's '.' does not match them
+        if (len(text) >= _MIN_REPETITION_SPAN and text[0] != '\n'
+                and text[0] * _MIN_REPETITION_SPAN in text):
+            return True
+        if len(text) >= _VECTORISED_REPETITION_MIN_LENGTH:
+            detected = _has_repeated_unit(text, _lowered(text, lowered))
+            if detected is not None:
+                return detected
         return bool(self.repetition_regex.search(text))
 
-    def scan_all(self, text: str, config: Dict) -> Dict[str, any]:
+    def scan_all(self, text: str, config: Dict, stop_on_length: bool = False) -> Dict[str, any]:
         """
         Run all configured pattern checks.
 
         Args:
             text: Text to analyse
             config: Configuration dict with enabled checks
+            stop_on_length: Return as soon as the length check fires, skipping
+                the regex checks
 
         Returns:
             Dict with scan results
@@ -176,19 +442,119 @@ class PatternMatcher:
             'detected_patterns': []
         }
 
+        if stop_on_length:
+            self._scan_check_excessive_length(results, config, text)
+            if results['violations']:
+                return results
+
+        # The length check always sees the whole prompt; the regex checks may
+        # be limited to its head and tail
+        scan_text = self._scan_window(text, config)
+        # Lower-cased once and shared by every check; only ASCII text is
+        # matched lower-cased (see the note above the pattern lists)
+        lowered = scan_text.lower()
+
         self._scan_check(results, config, 'check_prompt_injection', True,
-                         self.check_prompt_injection, text, 'prompt_injection', 'high')
+                         self.check_prompt_injection, scan_text, lowered, 'prompt_injection', 'high')
         self._scan_check(results, config, 'check_jailbreak', True,
-                         self.check_jailbreak, text, 'jailbreak', 'high')
+                         self.check_jailbreak, scan_text, lowered, 'jailbreak', 'high')
         self._scan_check(results, config, 'check_code_injection', True,
-                         self.check_code_injection, text, 'code_injection', 'critical')
+                         self.check_code_injection, scan_text, lowered, 'code_injection', 'critical')
         self._scan_check(results, config, 'check_pii', False,
-                         self.check_pii, text, 'pii_exposure', 'medium')
-        self._scan_check_excessive_length(results, config, text)
-        self._scan_check_repetition(results, text)
+                         self.check_pii, scan_text, lowered, 'pii_exposure', 'medium')
+        if not stop_on_length:
+            self._scan_check_excessive_length(results, config, text)
+        self._scan_check_repetition(results, scan_text, lowered)
 
         return results
 
+    def scan_chunks(self, chunks: Iterable[str], config: Dict,
+                    stop_on_length: bool = False) -> Dict[str, any]:
+        """
+        Run all configured pattern checks over text supplied in chunks.
+
+        Only the text since the last scan plus an overlap with the previous
+        scan is held, so memory stays bounded however long the text is. A
+        match longer than the overlap that spans a chunk boundary is not
+        found. The scan window settings do not apply; all of the text is
+        scanned.
+
+        Args:
+            chunks: Text to analyse, in order
+            config: Configuration dict with enabled checks
+            stop_on_length: Stop consuming chunks as soon as the length check
+                fires, reporting only the length violation
+
+        Returns:
+            Dict with scan results, as for scan_all()
+        """
+        chunk_config = dict(config, check_excessive_length=False, scan_window_head=0)
+        check_length = config.get('check_excessive_length', True)
+        max_length = config.get('max_prompt_length', 50000)
+
+        found = {}
+        total_length = 0
+        pending = ''
+        unscanned = False
+        for chunk in chunks:
+            total_length += len(chunk)
+            if stop_on_length and check_length and total_length > max_length:
+                found = {'excessive_length': f'Length: more than {max_length}'}
+                unscanned = False
+                break
+            pending += chunk
+            unscanned = True
+            if len(pending) >= 2 * _CHUNK_OVERLAP:
+                self._scan_chunk(pending, chunk_config, found)
+                pending = pending[-_CHUNK_OVERLAP:]
+                unscanned = False
+        else:
+            if check_length and total_length > max_length:
+                found['excessive_length'] = f'Length: {total_length} > {max_length}'
+
+        if unscanned:
+            self._scan_chunk(pending, chunk_config, found)
+
+        violations = [violation for violation in _VIOLATION_SEVERITY if violation in found]
+        severity = 'none'
+        for violation in violations:
+            severity = self._escalate_severity(severity, _VIOLATION_SEVERITY[violation])
+        return {
+            'violations': violations,
+            'severity': severity,
+            'detected_patterns': [found[violation] for violation in violations]
+        }
+
+    def _scan_chunk(self, text: str, config: Dict, found: Dict[str, str]) -> None:
+        """Scan one stretch of chunked text, keeping the first pattern found per violation."""
+        results = self.scan_all(text, config)
+        for violation, pattern in zip(results['violations'], results['detected_patterns']):
+            found.setdefault(violation, pattern)
+
+    @staticmethod
+    def _scan_window(text: str, config: Dict) -> str:
+        """
+        Limit the text given to the regex checks to its head and tail.
+
+        Scanning only the first scan_window_head and last scan_window_tail
+        characters bounds the cost of inspecting very long prompts, at the
+        price of not inspecting the middle of them. Disabled unless
+        scan_window_head is set.
+
+        Args:
+            text: Full prompt text
+            config: Pattern configuration dict
+
+        Returns:
+            Text to run the regex checks against
+        """
+        head = config.get('scan_window_head', 0)
+        tail = config.get('scan_window_tail', 0)
+        if head <= 0 or len(text) <= head + tail:
+            return text
+        # The separator keeps patterns from matching across the join
+        return text[:head] + SCAN_WINDOW_SEPARATOR + (text[-tail:] if tail > 0 else '')
+
     @staticmethod
     def _escalate_severity(current: str, proposed: str) -> str:
         """Return the more severe of two severity levels."""
@@ -196,12 +562,12 @@ class PatternMatcher:
         return proposed if order.index(proposed) > order.index(current) else current
 
     def _scan_check(self, results: Dict, config: Dict, config_key: str,
-                    default_enabled: bool, check_fn, text: str,
+                    default_enabled: bool, check_fn, text: str, lowered: str,
                     violation_name: str, severity: str) -> None:
         """Run a single pattern check and update results if a violation is detected."""
         if not config.get(config_key, default_enabled):
             return
-        detected, pattern = check_fn(text)
+        detected, pattern = check_fn(text, lowered)
         if detected:
             results['violations'].append(violation_name)
             results['detected_patterns'].append(pattern)
@@ -219,9 +585,9 @@ class PatternMatcher:
             if results['severity'] == 'none':
                 results['severity'] = 'medium'
 
-    def _scan_check_repetition(self, results: Dict, text: str) -> None:
+    def _scan_check_repetition(self, results: Dict, text: str, lowered: str) -> None:
         """Check for excessive repetition and update results."""
-        if self.check_excessive_repetition(text):
+        if self.check_excessive_repetition(text, lowered):
             results['violations'].append('excessive_repetition')
             results['detected_patterns'].append('Detected repetitive pattern')
             if results['severity'] == 'none':
@@ -10,32 +10,70 @@ This module provides:
 
 """
 
+import hashlib
 import json
 import logging
-from dataclasses import dataclass
-from typing import Optional, Dict, List, Any
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Optional, Dict, Iterable, List, Any, Tuple
 from datetime import datetime
 
 from .patterns import PatternMatcher
 
+# Default number of inspection verdicts kept per inspector
+_DEFAULT_VERDICT_CACHE_SIZE = 4096
 
-@dataclass
+# Length of the prompt excerpt recorded with a logged violation
+_SNIPPET_LENGTH = 500
+
+# Keywords flagged by standard inspection
+_SUSPICIOUS_KEYWORDS = (
+    'ignore instructions', 'bypass', 'override', 'jailbreak',
+    'system prompt', 'disable safety', 'unrestricted mode'
+)
+_KEYWORD_OVERLAP = max(len(keyword) for keyword in _SUSPICIOUS_KEYWORDS) - 1
+
+
+@dataclass(frozen=True, slots=True)
 class InspectionResult:
     """
     Result of prompt inspection.
+
+    Results are immutable; use dataclasses.replace() to derive a changed one.
     """
     is_safe: bool
     blocked: bool
     needs_confirmation: bool
-    violation_types: List[str]
+    violation_types: Tuple[str, ...]
     severity: str  # none, low, medium, high, critical
     confidence: float  # 0.0-1.0
     explanation: str
-    detected_patterns: List[str]
+    detected_patterns: Tuple[str, ...]
     sanitised_prompt: Optional[str] = None
     inspection_method: str = 'pattern'  # pattern, llm, hybrid
 
 
+def _safe_result(explanation: str, confidence: float) -> InspectionResult:
+    """Build a result for a prompt with no violations."""
+    return InspectionResult(
+        is_safe=True,
+        blocked=False,
+        needs_confirmation=False,
+        violation_types=(),
+        severity='none',
+        confidence=confidence,
+        explanation=explanation,
+        detected_patterns=()
+    )
+
+
+# Results for the common safe outcomes are built once and shared by every call
+_SAFE_RESULT = _safe_result('No security issues detected.', 0.0)
+_DISABLED_RESULT = _safe_result('Inspection disabled', 1.0)
+_WHITELISTED_RESULT = _safe_result('User whitelisted', 1.0)
+
+
 class PromptInspector:
     """
     Main prompt inspection system with pattern-based and LLM-based analysis.
@@ -69,6 +107,15 @@ class PromptInspector:
         # Whitelist users (exempt from inspection)
         self.whitelist_users = set(config.get('whitelist_users', []))
 
+        # Verdicts for recently seen prompts, keyed by prompt digest. Strict
+        # inspection consults the LLM, whose verdict is not a pure function of
+        # the prompt, so it is never cached.
+        self._verdict_cache_size = config.get('verdict_cache_size', _DEFAULT_VERDICT_CACHE_SIZE)
+        if self.inspection_level == 'strict':
+            self._verdict_cache_size = 0
+        self._verdict_cache: OrderedDict = OrderedDict()
+        self._verdict_cache_lock = threading.Lock()
+
         logging.info(f"Prompt inspector initialised: level={self.inspection_level}, action={self.action}")
 
     def inspect_prompt(self, prompt: str, user_guid: str,
@@ -85,46 +132,90 @@ class PromptInspector:
             InspectionResult with findings and recommended actions
         """
         if not self.enabled:
-            return InspectionResult(
-                is_safe=True,
-                blocked=False,
-                needs_confirmation=False,
-                violation_types=[],
-                severity='none',
-                confidence=1.0,
-                explanation='Inspection disabled',
-                detected_patterns=[]
-            )
+            return _DISABLED_RESULT
 
         # Check if user is whitelisted
         if user_guid in self.whitelist_users:
             logging.debug(f"User {user_guid} is whitelisted, skipping inspection")
-            return InspectionResult(
-                is_safe=True,
-                blocked=False,
-                needs_confirmation=False,
-                violation_types=[],
-                severity='none',
-                confidence=1.0,
-                explanation='User whitelisted',
-                detected_patterns=[]
-            )
+            return _WHITELISTED_RESULT
 
-        # Run inspection based on configured level
-        if self.inspection_level == 'basic':
-            result = self._pattern_based_inspection(prompt)
-        elif self.inspection_level == 'standard':
-            result = self._standard_inspection(prompt)
-        elif self.inspection_level == 'strict':
-            result = self._strict_inspection(prompt)
-        else:
-            # Default to basic if invalid level
-            result = self._pattern_based_inspection(prompt)
+        # Run inspection, reusing the verdict for a recently seen prompt
+        result = self._cached_verdict(prompt)
 
-        # Determine action based on results
+        self._log_violation(result, prompt[:_SNIPPET_LENGTH], user_guid, conversation_id)
+        return result
+
+    def inspect_prompt_iter(self, chunks: Iterable[str], user_guid: str,
+                            conversation_id: Optional[int] = None) -> InspectionResult:
+        """
+        Inspect a user prompt supplied as an iterable of text chunks.
+
+        Pattern and keyword checks run as the chunks arrive, holding only a
+        bounded overlap between them, so a very long prompt need not be built
+        in memory. With the 'block' action, chunks stop being consumed once
+        the prompt exceeds max_prompt_length. Strict inspection needs the
+        whole prompt for the LLM, so its chunks are joined and passed to
+        inspect_prompt(). Verdicts are not cached.
+
+        Args:
+            chunks: User's prompt to inspect, in order
+            user_guid: User's unique identifier
+            conversation_id: Optional conversation ID for logging
+
+        Returns:
+            InspectionResult with findings and recommended actions
+        """
+        if not self.enabled:
+            return _DISABLED_RESULT
+
+        # Check if user is whitelisted
+        if user_guid in self.whitelist_users:
+            logging.debug(f"User {user_guid} is whitelisted, skipping inspection")
+            return _WHITELISTED_RESULT
+
+        if self.inspection_level == 'strict':
+            return self.inspect_prompt(''.join(chunks), user_guid, conversation_id)
+
+        snippet = []
+        found_keywords = set()
+
+        def tracked_chunks():
+            # Collect the logged excerpt and keywords as the chunks go past
+            snippet_length = 0
+            carry = ''
+            for chunk in chunks:
+                if snippet_length < _SNIPPET_LENGTH:
+                    snippet.append(chunk[:_SNIPPET_LENGTH - snippet_length])
+                    snippet_length += len(snippet[-1])
+                if self.inspection_level == 'standard':
+                    window = carry + chunk.lower()
+                    found_keywords.update(kw for kw in _SUSPICIOUS_KEYWORDS if kw in window)
+                    carry = window[-_KEYWORD_OVERLAP:]
+                yield chunk
+
+        patterns_config = self.config.get('patterns', {})
+        scan_results = self.pattern_matcher.scan_chunks(tracked_chunks(), patterns_config,
+                                                        stop_on_length=self.action == 'block')
+        result = self._result_from_scan(scan_results)
+        if self.inspection_level == 'standard':
+            result = self._with_suspicious_keywords(
+                result, [kw for kw in _SUSPICIOUS_KEYWORDS if kw in found_keywords])
         result = self._apply_action_policy(result)
 
-        # Log violation if configured
+        self._log_violation(result, ''.join(snippet), user_guid, conversation_id)
+        return result
+
+    def _log_violation(self, result: InspectionResult, prompt_snippet: str,
+                       user_guid: str, conversation_id: Optional[int]) -> None:
+        """
+        Log a violation to the audit trail, if configured and the result has one.
+
+        Args:
+            result: Inspection result
+            prompt_snippet: Start of the inspected prompt
+            user_guid: User's unique identifier
+            conversation_id: Optional conversation ID for logging
+        """
         if self.violation_logger and result.violation_types:
             if result.blocked:
                 action_taken = 'blocked'
@@ -138,14 +229,81 @@ class PromptInspector:
                 conversation_id=conversation_id,
                 violation_types=result.violation_types,
                 severity=result.severity,
-                prompt_snippet=prompt[:500],
+                prompt_snippet=prompt_snippet,
                 detection_method=result.inspection_method,
                 action_taken=action_taken,
                 confidence_score=result.confidence
             )
 
+    def inspect_batch(self, prompts: List[str], user_guid: str,
+                      conversation_id: Optional[int] = None) -> List[InspectionResult]:
+        """
+        Inspect several prompts from the same user.
+
+        Repeated prompts within the batch are inspected once and share the
+        cached verdict (except for strict inspection, which is never cached).
+
+        Args:
+            prompts: Prompts to inspect
+            user_guid: User's unique identifier
+            conversation_id: Optional conversation ID for logging
+
+        Returns:
+            One InspectionResult per prompt, in the same order
+        """
+        return [self.inspect_prompt(prompt, user_guid, conversation_id) for prompt in prompts]
+
+    def _cached_verdict(self, prompt: str) -> InspectionResult:
+        """
+        Return the inspection verdict for a prompt, reusing a cached verdict when possible.
+
+        Args:
+            prompt: Prompt to inspect
+
+        Returns:
+            InspectionResult
+        """
+        if self._verdict_cache_size <= 0:
+            return self._run_inspection(prompt)
+
+        key = hashlib.blake2b(prompt.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        with self._verdict_cache_lock:
+            cached = self._verdict_cache.get(key)
+            if cached is not None:
+                self._verdict_cache.move_to_end(key)
+                return cached
+
+        result = self._run_inspection(prompt)
+
+        with self._verdict_cache_lock:
+            self._verdict_cache[key] = result
+            while len(self._verdict_cache) > self._verdict_cache_size:
+                self._verdict_cache.popitem(last=False)
         return result
 
+    def _run_inspection(self, prompt: str) -> InspectionResult:
+        """
+        Inspect a prompt at the configured level and apply the action policy.
+
+        Args:
+            prompt: Prompt to inspect
+
+        Returns:
+            InspectionResult
+        """
+        if self.inspection_level == 'basic':
+            result = self._pattern_based_inspection(prompt)
+        elif self.inspection_level == 'standard':
+            result = self._standard_inspection(prompt)
+        elif self.inspection_level == 'strict':
+            result = self._strict_inspection(prompt)
+        else:
+            # Default to basic if invalid level
+            result = self._pattern_based_inspection(prompt)
+
+        # Determine action based on results
+        return self._apply_action_policy(result)
+
     def _pattern_based_inspection(self, prompt: str) -> InspectionResult:
         """
         Fast pattern-based inspection using regex.
@@ -157,20 +315,36 @@ class PromptInspector:
             InspectionResult
         """
         patterns_config = self.config.get('patterns', {})
-        scan_results = self.pattern_matcher.scan_all(prompt, patterns_config)
+        # An over-length prompt is rejected under 'block' whatever else it
+        # contains, so the regex checks can be skipped for it
+        scan_results = self.pattern_matcher.scan_all(prompt, patterns_config,
+                                                     stop_on_length=self.action == 'block')
+        return self._result_from_scan(scan_results)
+
+    def _result_from_scan(self, scan_results: Dict) -> InspectionResult:
+        """
+        Build an inspection result from pattern scan results.
+
+        Args:
+            scan_results: Results from the pattern matcher
+
+        Returns:
+            InspectionResult
+        """
+        if not scan_results['violations']:
+            return _SAFE_RESULT
 
-        is_safe = len(scan_results['violations']) == 0
         explanation = self._generate_explanation(scan_results['violations'], scan_results['detected_patterns'])
 
         return InspectionResult(
-            is_safe=is_safe,
+            is_safe=False,
             blocked=False,  # Will be set by _apply_action_policy
             needs_confirmation=False,  # Will be set by _apply_action_policy
-            violation_types=scan_results['violations'],
+            violation_types=tuple(scan_results['violations']),
             severity=scan_results['severity'],
-            confidence=1.0 if scan_results['violations'] else 0.0,
+            confidence=1.0,
             explanation=explanation,
-            detected_patterns=scan_results['detected_patterns'],
+            detected_patterns=tuple(scan_results['detected_patterns']),
             inspection_method='pattern'
         )
 
@@ -188,20 +362,31 @@ class PromptInspector:
         result = self._pattern_based_inspection(prompt)
 
         # Add keyword-based heuristics
-        suspicious_keywords = [
-            'ignore instructions', 'bypass', 'override', 'jailbreak',
-            'system prompt', 'disable safety', 'unrestricted mode'
-        ]
-
         prompt_lower = prompt.lower()
-        found_keywords = [kw for kw in suspicious_keywords if kw in prompt_lower]
+        found_keywords = [kw for kw in _SUSPICIOUS_KEYWORDS if kw in prompt_lower]
+        return self._with_suspicious_keywords(result, found_keywords)
+
+    @staticmethod
+    def _with_suspicious_keywords(result: InspectionResult, found_keywords: List[str]) -> InspectionResult:
+        """
+        Flag suspicious keywords on a result that has no other violations.
+
+        Args:
+            result: Pattern-based inspection result
+            found_keywords: Suspicious keywords found in the prompt
 
+        Returns:
+            InspectionResult
+        """
         if found_keywords and not result.violation_types:
-            result.violation_types.append('suspicious_keywords')
-            result.severity = 'low'
-            result.is_safe = False
-            result.explanation += f"\n\nSuspicious keywords detected: {', '.join(found_keywords)}"
-            result.detected_patterns.extend(found_keywords)
+            result = replace(
+                result,
+                violation_types=('suspicious_keywords',),
+                severity='low',
+                is_safe=False,
+                explanation=result.explanation + f"\n\nSuspicious keywords detected: {', '.join(found_keywords)}",
+                detected_patterns=result.detected_patterns + tuple(found_keywords)
+            )
 
         return result
 
@@ -227,26 +412,29 @@ class PromptInspector:
                 # Combine results (most severe wins)
                 if not llm_result.is_safe:
                     # Merge violation types
-                    all_violations = set(result.violation_types + llm_result.violation_types)
-                    result.violation_types = list(all_violations)
+                    all_violations = dict.fromkeys(result.violation_types + llm_result.violation_types)
 
                     # Use most severe severity
                     severity_order = ['none', 'low', 'medium', 'high', 'critical']
-                    result.severity = max(result.severity, llm_result.severity,
-                                        key=lambda s: severity_order.index(s))
+                    severity = max(result.severity, llm_result.severity,
+                                   key=lambda s: severity_order.index(s))
 
                     # Combine explanations
+                    explanation = result.explanation
                     if llm_result.explanation:
-                        result.explanation += f"\n\nLLM Analysis: {llm_result.explanation}"
-
-                    # Use LLM confidence
-                    result.confidence = llm_result.confidence
-                    result.is_safe = False
-                    result.inspection_method = 'hybrid'
-
-                    # Use sanitised version if available
-                    if llm_result.sanitised_prompt:
-                        result.sanitised_prompt = llm_result.sanitised_prompt
+                        explanation += f"\n\nLLM Analysis: {llm_result.explanation}"
+
+                    # Use LLM confidence and sanitised version if available
+                    result = replace(
+                        result,
+                        violation_types=tuple(all_violations),
+                        severity=severity,
+                        explanation=explanation,
+                        confidence=llm_result.confidence,
+                        is_safe=False,
+                        inspection_method='hybrid',
+                        sanitised_prompt=llm_result.sanitised_prompt or result.sanitised_prompt
+                    )
 
             except Exception as e:
                 logging.error(f"LLM inspection failed: {e}")
@@ -323,11 +511,11 @@ User prompt to analyse:
                     is_safe=False,
                     blocked=False,
                     needs_confirmation=False,
-                    violation_types=[violation_type] if violation_type != 'none' else [],
+                    violation_types=(violation_type,) if violation_type != 'none' else (),
                     severity=analysis.get('severity', 'medium'),
                     confidence=confidence,
                     explanation=analysis.get('explanation', 'Potential security risk detected'),
-                    detected_patterns=[],
+                    detected_patterns=(),
                     sanitised_prompt=analysis.get('sanitised_version'),
                     inspection_method='llm'
                 )
@@ -337,11 +525,11 @@ User prompt to analyse:
                 is_safe=True,
                 blocked=False,
                 needs_confirmation=False,
-                violation_types=[],
+                violation_types=(),
                 severity='none',
                 confidence=confidence,
                 explanation='No significant issues detected by LLM analysis',
-                detected_patterns=[],
+                detected_patterns=(),
                 inspection_method='llm'
             )
 
@@ -352,11 +540,11 @@ User prompt to analyse:
                 is_safe=True,
                 blocked=False,
                 needs_confirmation=False,
-                violation_types=[],
+                violation_types=(),
                 severity='none',
                 confidence=0.0,
                 explanation=f'LLM analysis failed: {str(e)}',
-                detected_patterns=[],
+                detected_patterns=(),
                 inspection_method='llm'
             )
 
@@ -376,22 +564,18 @@ User prompt to analyse:
         action = self.action
 
         if action == 'block':
-            result.blocked = True
-            result.needs_confirmation = False
+            return replace(result, blocked=True, needs_confirmation=False)
         elif action == 'warn':
-            result.blocked = False
-            result.needs_confirmation = True
+            return replace(result, blocked=False, needs_confirmation=True)
         elif action == 'sanitise':
             # If we have a sanitised version, use it; otherwise warn
             if result.sanitised_prompt:
-                result.blocked = False
-                result.needs_confirmation = True  # Still ask for confirmation
-            else:
-                result.needs_confirmation = True
+                # Still ask for confirmation
+                return replace(result, blocked=False, needs_confirmation=True)
+            return replace(result, needs_confirmation=True)
         elif action == 'log_only':
-            result.blocked = False
-            result.needs_confirmation = False
             # Just log, don't interfere
+            return replace(result, blocked=False, needs_confirmation=False)
 
         return result
 
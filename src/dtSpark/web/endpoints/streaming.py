@@ -8,20 +8,298 @@ and progress updates.
 """
 
 import asyncio
+import functools
 import json
 import logging
-from typing import Annotated, AsyncGenerator
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Annotated, AsyncGenerator, Callable, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, Request
+from pydantic import BaseModel
 from sse_starlette.sse import EventSourceResponse
 
 from ..dependencies import get_current_session
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Interval between polls of the database while a chat response is in progress
+_POLL_INTERVAL = 0.2
+
+# Upper bound for the back-off applied when polling the database fails
+_MAX_POLL_BACKOFF = 2.0
+
+# Interval between keep-alive pings on long-lived chat streams
+_PING_INTERVAL = 15
+
+# Maximum number of emitted interactive requests remembered per chat stream
+_MAX_TRACKED_REQUESTS = 4096
+
+# Default number of chat responses processed concurrently
+_DEFAULT_MAX_CONCURRENT_STREAMS = 4
+
+# Prefix marking a stored message as a list of tool results
+_TOOL_RESULTS_PREFIX = '[TOOL_RESULTS]'
+
+
+def _dumps(obj) -> str:
+    """
+    Serialise an SSE event payload to a JSON string.
+
+    Uses orjson when it is installed, as event encoding sits on the hot path
+    of every stream, and falls back to the standard library otherwise.
+
+    Args:
+        obj: JSON-serialisable payload
+
+    Returns:
+        JSON string
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj)
+
+
+def _dumps_bytes(obj) -> bytes:
+    """Serialise an SSE event payload to UTF-8 encoded JSON."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode('utf-8')
+
+
+# Line separator used in SSE frames (matches sse_starlette's default)
+_SSE_SEPARATOR = b'\r\n'
+
+
+@functools.lru_cache(maxsize=None)
+def _event_prefix(event: str) -> bytes:
+    """Build the encoded frame prefix for an event name."""
+    return b'event: ' + event.encode('utf-8') + _SSE_SEPARATOR + b'data: '
+
+
+def _encode_event(event: str, payload) -> bytes:
+    """
+    Encode an event as a complete SSE frame.
+
+    sse_starlette passes bytes through unchanged, skipping its own per-frame
+    formatting. JSON never contains raw line breaks, so the payload always
+    fits on a single data line.
+
+    Args:
+        event: SSE event name
+        payload: JSON-serialisable event data
+
+    Returns:
+        Encoded SSE frame
+    """
+    return _event_prefix(event) + _dumps_bytes(payload) + _SSE_SEPARATOR + _SSE_SEPARATOR
+
+
+class _RecentKeys:
+    """
+    Bounded set of recently seen keys.
+
+    Once full, the oldest key is evicted, so memory stays constant however
+    long a stream runs.
+    """
+
+    def __init__(self, maxlen: int = _MAX_TRACKED_REQUESTS):
+        """
+        Initialise the key set.
+
+        Args:
+            maxlen: Maximum number of keys to remember
+        """
+        self._keys = OrderedDict()
+        self._maxlen = maxlen
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def add(self, key) -> bool:
+        """
+        Record a key.
+
+        Args:
+            key: Hashable key to record
+
+        Returns:
+            True if the key was new, False if it had already been seen
+        """
+        if key in self._keys:
+            return False
+        self._keys[key] = None
+        if len(self._keys) > self._maxlen:
+            self._keys.popitem(last=False)
+        return True
+
+
+# Frame prefix and suffix for non-final text responses, so only the text is encoded
+_TEXT_EVENT_PREFIX = _event_prefix('response') + b'{"type":"text","content":'
+_TEXT_EVENT_SUFFIX = b',"final":false}' + _SSE_SEPARATOR + _SSE_SEPARATOR
+
+
+def _text_event(text: str) -> bytes:
+    """
+    Encode a non-final text response event.
+
+    Text events are the most frequent frames on a chat stream and always share
+    the same shape, so the fixed parts are pre-encoded.
+
+    Args:
+        text: Response text
+
+    Returns:
+        Encoded SSE frame
+    """
+    return _TEXT_EVENT_PREFIX + _dumps_bytes(text) + _TEXT_EVENT_SUFFIX
+
+
+# Frame template for structured errors, with each field encoded separately
+_STRUCTURED_ERROR_FRAME = (
+    _event_prefix('error')
+    + b'{"message":%b,"error_type":%b,"error_code":%b,"suggestion":%b,"retries_attempted":%b}'
+    + _SSE_SEPARATOR + _SSE_SEPARATOR
+)
+
+
+def _structured_error_event(response: dict) -> bytes:
+    """
+    Encode a structured error response (dict with _error flag) as an SSE frame.
+
+    Args:
+        response: Structured error returned by the conversation manager
+
+    Returns:
+        Encoded SSE frame
+    """
+    return _STRUCTURED_ERROR_FRAME % (
+        _dumps_bytes(response.get('error_message', 'An error occurred')),
+        _dumps_bytes(response.get('error_type', 'Unknown')),
+        _dumps_bytes(response.get('error_code', 'Unknown')),
+        _dumps_bytes(response.get('suggestion', '')),
+        _dumps_bytes(response.get('retries_attempted', 0)),
+    )
+
+
+def _text_block_events(block: dict) -> List[bytes]:
+    """Build events for a text block that accompanies tool calls."""
+    text = block.get('text')
+    if not text:
+        return []
+    return [_text_event(text)]
+
+
+def _tool_use_block_events(block: dict) -> List[bytes]:
+    """Build events for a tool call block."""
+    return [_encode_event("tool_start", {
+        "tool_name": block.get('name'),
+        "input": block.get('input', {}),
+    })]
+
+
+def _server_tool_use_block_events(block: dict) -> List[bytes]:
+    """Build events for a server-side tool call block (web search start)."""
+    return [_encode_event("web_search_start", {
+        "tool_name": block.get('name', 'web_search'),
+        "tool_use_id": block.get('id'),
+        "input": block.get('input', {}),
+    })]
+
+
+def _web_search_result_block_events(block: dict) -> List[bytes]:
+    """Build events for a web search result block, extracting source information."""
+    results = block.get('content', [])
+    sources = []
+    if isinstance(results, list):
+        for result in results:
+            if isinstance(result, dict) and result.get('type') == 'web_search_result':
+                sources.append({
+                    'url': result.get('url', ''),
+                    'title': result.get('title', ''),
+                    'page_age': result.get('page_age', ''),
+                })
+    return [_encode_event("web_search_results", {
+        "tool_use_id": block.get('tool_use_id'),
+        "sources": sources,
+        "source_count": len(sources),
+    })]
+
+
+# Event builders for assistant content blocks, keyed by block type
+_BLOCK_HANDLERS: Dict[str, Callable[[dict], List[bytes]]] = {
+    'text': _text_block_events,
+    'tool_use': _tool_use_block_events,
+    'server_tool_use': _server_tool_use_block_events,
+    'web_search_tool_result': _web_search_result_block_events,
+}
+
+# Block types still emitted by the final poll once the response has completed
+_FINAL_POLL_BLOCK_TYPES = frozenset({'server_tool_use', 'web_search_tool_result'})
+
+
+def _is_block_content(content: str) -> bool:
+    """
+    Check whether stored message content looks like a JSON list of content blocks.
+
+    Only inspects the first character, stripping leading whitespace only when
+    present, so plain text messages are rejected without copying them.
+    """
+    lead = content[:1]
+    if lead.isspace():
+        lead = content.lstrip()[:1]
+    return lead == '['
+
+
+def _assistant_block_events(content: str, block_types: Optional[frozenset] = None) -> List[bytes]:
+    """
+    Parse an assistant message's content blocks and build their SSE events.
+
+    Args:
+        content: Stored message content (JSON list of content blocks)
+        block_types: Block types to emit events for, or None for all
+
+    Returns:
+        List of encoded SSE frames, empty if the content is not a block list
+    """
+    try:
+        blocks = json.loads(content)
+    except ValueError:
+        return []
+    if not isinstance(blocks, list):
+        return []
+
+    events = []
+    for block in blocks:
+        if not isinstance(block, dict):
+            continue
+        block_type = block.get('type')
+        if block_types is not None and block_type not in block_types:
+            continue
+        handler = _BLOCK_HANDLERS.get(block_type)
+        if handler:
+            events.extend(handler(block))
+    return events
+
+
+class StreamMetrics(BaseModel):
+    """Chat stream admission metrics."""
+    active_streams: int
+    waiting_streams: int
+    max_concurrent_streams: int
+
 
 class StreamingManager:
     """
@@ -34,355 +312,337 @@ class StreamingManager:
     - Progress bars and status updates
     """
 
-    def __init__(self):
-        """Initialise the streaming manager."""
+    def __init__(self, max_concurrent_streams: int = _DEFAULT_MAX_CONCURRENT_STREAMS):
+        """
+        Initialise the streaming manager.
+
+        Args:
+            max_concurrent_streams: Maximum number of chat responses processed at once
+        """
         self._active_streams = {}
+        self._max_concurrent_streams = max_concurrent_streams
+        self._active_chat_streams = 0
+        self._waiting_chat_streams = 0
+        self._admission = asyncio.Condition()
+        # Pending slot releases for abandoned sends, kept referenced until they run
+        self._deferred_releases = set()
+
+    @property
+    def max_concurrent_streams(self) -> int:
+        """Maximum number of chat responses processed at once."""
+        return self._max_concurrent_streams
+
+    def set_max_concurrent_streams(self, max_concurrent_streams: int):
+        """
+        Set the maximum number of chat responses processed at once.
+
+        Active streams are never interrupted when the limit is lowered; waiting
+        streams re-check the limit whenever an active stream finishes.
+
+        Args:
+            max_concurrent_streams: New limit (at least 1)
+        """
+        self._max_concurrent_streams = max(1, max_concurrent_streams)
+
+    def get_metrics(self) -> dict:
+        """
+        Get chat stream admission metrics.
+
+        Returns:
+            Dictionary with active, waiting and maximum stream counts
+        """
+        return {
+            'active_streams': self._active_chat_streams,
+            'waiting_streams': self._waiting_chat_streams,
+            'max_concurrent_streams': self._max_concurrent_streams,
+        }
+
+    async def _acquire_chat_slot(self):
+        """Wait until a chat stream slot is free and claim it."""
+        async with self._admission:
+            self._waiting_chat_streams += 1
+            try:
+                await self._admission.wait_for(
+                    lambda: self._active_chat_streams < self._max_concurrent_streams
+                )
+            finally:
+                self._waiting_chat_streams -= 1
+            self._active_chat_streams += 1
+
+    async def _release_chat_slot(self):
+        """Release a chat stream slot and wake all waiting streams to re-check the limit."""
+        async with self._admission:
+            self._active_chat_streams -= 1
+            self._admission.notify_all()
+
+    def _release_chat_slot_when_done(self, send_future: asyncio.Future):
+        """
+        Release a chat stream slot once an abandoned send has finished.
+
+        The blocking send keeps its executor worker after the client has gone,
+        possibly for minutes while it waits on a permission request. Holding the
+        slot until then keeps newly admitted streams from queueing behind it in
+        an executor sized to the slot count.
+
+        Args:
+            send_future: Future of the send started by the abandoned stream
+        """
+        def release(_future):
+            task = asyncio.ensure_future(self._release_chat_slot())
+            self._deferred_releases.add(task)
+            task.add_done_callback(self._deferred_releases.discard)
+
+        send_future.add_done_callback(release)
 
     async def stream_chat_response(
         self,
         conversation_manager,
         message: str,
-    ) -> AsyncGenerator[dict, None]:
+        executor: Optional[Executor] = None,
+    ) -> AsyncGenerator[bytes, None]:
         """
         Stream a chat response with real-time updates including tool calls.
 
+        Only a limited number of responses are processed at once; further
+        streams wait for a free slot after sending their "processing" event.
+
         Args:
             conversation_manager: ConversationManager instance
             message: User message to send
+            executor: Executor to run the blocking send in (defaults to the loop's executor)
 
         Yields:
-            Dictionary events for SSE streaming
+            Encoded SSE frames
         """
-        import concurrent.futures
-        import threading
-
+        # Send initial "processing" event
+        yield _encode_event("status", {
+            "type": "processing",
+            "message": "",
+        })
+
+        await self._acquire_chat_slot()
+        send_futures = []
         try:
-            # Send initial "processing" event
-            yield {
-                "event": "status",
-                "data": json.dumps({
-                    "type": "processing",
-                    "message": "",
-                }),
-            }
+            async for frame in self._stream_admitted_chat_response(
+                conversation_manager, message, executor, send_futures
+            ):
+                yield frame
+        finally:
+            if send_futures and not send_futures[0].done():
+                # The client disconnected while the send was still running
+                self._release_chat_slot_when_done(send_futures[0])
+            else:
+                await self._release_chat_slot()
+
+    async def _stream_admitted_chat_response(
+        self,
+        conversation_manager,
+        message: str,
+        executor: Optional[Executor],
+        send_futures: List[asyncio.Future],
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        Send a message and stream its progress once admitted.
+
+        Args:
+            conversation_manager: ConversationManager instance
+            message: User message to send
+            executor: Executor to run the blocking send in
+            send_futures: List the send's future is appended to once started
 
-            # Get the current conversation ID and track starting message count
+        Yields:
+            Encoded SSE frames
+        """
+        try:
+            # Get the current conversation ID and track the last message already stored
             conversation_id = conversation_manager.current_conversation_id
             database = conversation_manager.database
 
-            # Get initial message count (before sending)
+            # Get the ID of the latest message (before sending). Database calls are
+            # blocking, so they run in a worker thread to keep the event loop free.
             try:
-                initial_messages = database.get_conversation_messages(conversation_id)
-                last_message_count = len(initial_messages)
+                last_message_id = await asyncio.to_thread(
+                    database.get_latest_message_id, conversation_id
+                )
             except Exception as e:
-                logger.error(f"Failed to get initial message count: {e}")
-                last_message_count = 0
-
-            # Result container for the thread
-            result_container = {'response': None, 'error': None, 'done': False}
+                logger.error(f"Failed to get initial message ID: {e}")
+                last_message_id = 0
+
+            # Run send_message in the executor
+            send_future = asyncio.get_running_loop().run_in_executor(
+                executor, conversation_manager.send_message, message
+            )
+            send_futures.append(send_future)
+
+            # Poll for new messages while the send is running
+            # Track (kind, request_id) pairs of interactive requests we've already emitted
+            emitted_requests = _RecentKeys()
+
+            # Resolve web interface callbacks once rather than on every poll
+            web_interface = getattr(conversation_manager, 'web_interface', None)
+            if web_interface:
+                get_permission_request = web_interface.get_pending_permission_request
+                get_security_request = web_interface.get_pending_security_request
+                get_compaction_status = web_interface.get_compaction_status
+                get_conflict_request = web_interface.get_pending_conflict_request
+            get_messages_after = database.get_conversation_messages_after
+
+            poll_backoff = _POLL_INTERVAL
+
+            while not send_future.done():
+                # Collect this poll's events so they are flushed together
+                events = []
 
-            # Run send_message in a background thread
-            def run_send_message():
-                try:
-                    result_container['response'] = conversation_manager.send_message(message)
-                except Exception as e:
-                    import traceback
-                    logger.error(f"Error in send_message thread: {e}")
-                    logger.error(f"Traceback: {traceback.format_exc()}")
-                    result_container['error'] = str(e)
-                finally:
-                    result_container['done'] = True
-
-            # Start the thread
-            thread = threading.Thread(target=run_send_message)
-            thread.start()
-
-            # Poll for new messages while thread is running
-            emitted_messages = set()  # Track which message IDs we've already emitted
-            emitted_permission_requests = set()  # Track which permission requests we've already emitted
-            emitted_security_requests = set()  # Track which security requests we've already emitted
-
-            while not result_container['done']:
                 # Check for pending permission requests (if web interface is available)
-                if hasattr(conversation_manager, 'web_interface') and conversation_manager.web_interface:
-                    pending_request = conversation_manager.web_interface.get_pending_permission_request()
+                if web_interface:
+                    pending_request = get_permission_request()
                     if pending_request:
                         request_id = pending_request['request_id']
-                        if request_id not in emitted_permission_requests:
-                            emitted_permission_requests.add(request_id)
-                            yield {
-                                "event": "permission_request",
-                                "data": json.dumps({
-                                    "request_id": request_id,
-                                    "tool_name": pending_request['tool_name'],
-                                    "tool_description": pending_request.get('tool_description'),
-                                }),
-                            }
+                        if emitted_requests.add(('permission', request_id)):
+                            events.append(_encode_event("permission_request", {
+                                "request_id": request_id,
+                                "tool_name": pending_request['tool_name'],
+                                "tool_description": pending_request.get('tool_description'),
+                            }))
 
                     # Check for pending security confirmation requests
-                    security_request = conversation_manager.web_interface.get_pending_security_request()
+                    security_request = get_security_request()
                     if security_request:
                         request_id = security_request['request_id']
-                        if request_id not in emitted_security_requests:
-                            emitted_security_requests.add(request_id)
-                            yield {
-                                "event": "security_confirmation",
-                                "data": json.dumps({
-                                    "request_id": request_id,
-                                    "severity": security_request.get('severity', 'warning'),
-                                    "issues": security_request.get('issues', []),
-                                    "explanation": security_request.get('explanation', ''),
-                                    "patterns": security_request.get('patterns', []),
-                                    "detection_method": security_request.get('detection_method', 'unknown'),
-                                }),
-                            }
+                        if emitted_requests.add(('security', request_id)):
+                            events.append(_encode_event("security_confirmation", {
+                                "request_id": request_id,
+                                "severity": security_request.get('severity', 'warning'),
+                                "issues": security_request.get('issues', []),
+                                "explanation": security_request.get('explanation', ''),
+                                "patterns": security_request.get('patterns', []),
+                                "detection_method": security_request.get('detection_method', 'unknown'),
+                            }))
 
                     # Check for compaction status updates
-                    compaction_status = conversation_manager.web_interface.get_compaction_status()
+                    compaction_status = get_compaction_status()
                     if compaction_status:
-                        yield {
-                            "event": "compaction_status",
-                            "data": json.dumps({
-                                "status": compaction_status.get('status'),
-                                "message": compaction_status.get('message'),
-                                "original_tokens": compaction_status.get('original_tokens'),
-                                "compacted_tokens": compaction_status.get('compacted_tokens'),
-                                "reduction_pct": compaction_status.get('reduction_pct'),
-                                "elapsed_time": compaction_status.get('elapsed_time'),
-                            }),
-                        }
+                        events.append(_encode_event("compaction_status", {
+                            "status": compaction_status.get('status'),
+                            "message": compaction_status.get('message'),
+                            "original_tokens": compaction_status.get('original_tokens'),
+                            "compacted_tokens": compaction_status.get('compacted_tokens'),
+                            "reduction_pct": compaction_status.get('reduction_pct'),
+                            "elapsed_time": compaction_status.get('elapsed_time'),
+                        }))
 
                     # Check for conflict resolution requests (orphan tool_results)
-                    conflict_request = conversation_manager.web_interface.get_pending_conflict_request()
+                    conflict_request = get_conflict_request()
                     if conflict_request:
                         request_id = conflict_request['request_id']
-                        if request_id not in emitted_permission_requests:  # Reuse this set to track
-                            emitted_permission_requests.add(request_id)
-                            yield {
-                                "event": "conflict_resolution",
-                                "data": json.dumps({
-                                    "request_id": request_id,
-                                    "tool_use_id": conflict_request.get('tool_use_id'),
-                                    "error_message": conflict_request.get('error_message'),
-                                    "conversation_id": conversation_id,
-                                }),
-                            }
+                        if emitted_requests.add(('conflict', request_id)):
+                            events.append(_encode_event("conflict_resolution", {
+                                "request_id": request_id,
+                                "tool_use_id": conflict_request.get('tool_use_id'),
+                                "error_message": conflict_request.get('error_message'),
+                                "conversation_id": conversation_id,
+                            }))
 
                 # Check for new messages
                 try:
-                    current_messages = database.get_conversation_messages(conversation_id)
+                    new_messages = await asyncio.to_thread(
+                        get_messages_after, conversation_id, last_message_id
+                    )
                 except Exception as e:
-                    # Database might be locked, retry on next poll
+                    # Database might be locked, back off before retrying
                     logger.warning(f"Database query failed during polling: {e}")
-                    await asyncio.sleep(0.2)
-                    continue
-
-                # Find new messages since last check
-                for msg in current_messages[last_message_count:]:
-                    msg_id = msg['id']
-                    if msg_id in emitted_messages:
-                        continue
+                    new_messages = []
+                    poll_delay = poll_backoff
+                    poll_backoff = min(poll_backoff * 2, _MAX_POLL_BACKOFF)
+                else:
+                    poll_delay = poll_backoff = _POLL_INTERVAL
 
-                    emitted_messages.add(msg_id)
+                # Process messages added since last check
+                for msg in new_messages:
+                    last_message_id = msg['id']
                     role = msg['role']
                     content = msg['content']
 
                     # Check message type and emit appropriate event
-                    if content.startswith('[TOOL_RESULTS]'):
+                    if content.startswith(_TOOL_RESULTS_PREFIX):
                         # Tool results
                         try:
-                            json_content = content.replace('[TOOL_RESULTS]', '').strip()
-                            results = json.loads(json_content)
+                            results = json.loads(content.removeprefix(_TOOL_RESULTS_PREFIX))
                             for result in results:
-                                yield {
-                                    "event": "tool_complete",
-                                    "data": json.dumps({
-                                        "tool_use_id": result.get('tool_use_id', 'unknown'),
-                                        "content": result.get('content', ''),
-                                    }),
-                                }
+                                events.append(_encode_event("tool_complete", {
+                                    "tool_use_id": result.get('tool_use_id', 'unknown'),
+                                    "content": result.get('content', ''),
+                                }))
                         except ValueError:
                             pass
 
-                    elif role == 'assistant' and content.strip().startswith('['):
-                        # Check if this is a tool call message (may contain text + tool_use)
-                        try:
-                            blocks = json.loads(content)
-                            if isinstance(blocks, list):
-                                for block in blocks:
-                                    if block.get('type') == 'text' and block.get('text'):
-                                        # Emit text content that appears with tool calls
-                                        yield {
-                                            "event": "response",
-                                            "data": json.dumps({
-                                                "type": "text",
-                                                "content": block.get('text'),
-                                                "final": False,
-                                            }),
-                                        }
-                                    elif block.get('type') == 'tool_use':
-                                        # Emit tool call
-                                        yield {
-                                            "event": "tool_start",
-                                            "data": json.dumps({
-                                                "tool_name": block.get('name'),
-                                                "input": block.get('input', {}),
-                                            }),
-                                        }
-                                    elif block.get('type') == 'server_tool_use':
-                                        # Emit web search start event
-                                        yield {
-                                            "event": "web_search_start",
-                                            "data": json.dumps({
-                                                "tool_name": block.get('name', 'web_search'),
-                                                "tool_use_id": block.get('id'),
-                                                "input": block.get('input', {}),
-                                            }),
-                                        }
-                                    elif block.get('type') == 'web_search_tool_result':
-                                        # Emit web search results event
-                                        content = block.get('content', [])
-                                        # Extract source information from results
-                                        sources = []
-                                        if isinstance(content, list):
-                                            for result in content:
-                                                if isinstance(result, dict) and result.get('type') == 'web_search_result':
-                                                    sources.append({
-                                                        'url': result.get('url', ''),
-                                                        'title': result.get('title', ''),
-                                                        'page_age': result.get('page_age', ''),
-                                                    })
-                                        yield {
-                                            "event": "web_search_results",
-                                            "data": json.dumps({
-                                                "tool_use_id": block.get('tool_use_id'),
-                                                "sources": sources,
-                                                "source_count": len(sources),
-                                            }),
-                                        }
-                        except ValueError:
-                            pass
+                    elif role == 'assistant' and _is_block_content(content):
+                        # Tool call message (may contain text + tool_use)
+                        events.extend(_assistant_block_events(content))
 
-                last_message_count = len(current_messages)
+                for event in events:
+                    yield event
 
-                # Small delay before next poll
-                await asyncio.sleep(0.2)
+                # Wait before next poll, waking early if the send completes
+                await asyncio.wait({send_future}, timeout=poll_delay)
 
-            # Thread finished - do one final poll to catch any messages we missed
+            # Send finished - do one final poll to catch any messages we missed
             try:
-                final_messages = database.get_conversation_messages(conversation_id)
-                for msg in final_messages[last_message_count:]:
-                    msg_id = msg['id']
-                    if msg_id in emitted_messages:
-                        continue
-
-                    emitted_messages.add(msg_id)
+                final_messages = await asyncio.to_thread(
+                    get_messages_after, conversation_id, last_message_id
+                )
+                for msg in final_messages:
                     role = msg['role']
                     content = msg['content']
 
-                    # Check for web search blocks in assistant messages
-                    if role == 'assistant' and content.strip().startswith('['):
-                        try:
-                            blocks = json.loads(content)
-                            if isinstance(blocks, list):
-                                for block in blocks:
-                                    if block.get('type') == 'text' and block.get('text'):
-                                        # Skip text blocks here - they'll be in the final response
-                                        pass
-                                    elif block.get('type') == 'server_tool_use':
-                                        yield {
-                                            "event": "web_search_start",
-                                            "data": json.dumps({
-                                                "tool_name": block.get('name', 'web_search'),
-                                                "tool_use_id": block.get('id'),
-                                                "input": block.get('input', {}),
-                                            }),
-                                        }
-                                    elif block.get('type') == 'web_search_tool_result':
-                                        content_list = block.get('content', [])
-                                        sources = []
-                                        if isinstance(content_list, list):
-                                            for result in content_list:
-                                                if isinstance(result, dict) and result.get('type') == 'web_search_result':
-                                                    sources.append({
-                                                        'url': result.get('url', ''),
-                                                        'title': result.get('title', ''),
-                                                        'page_age': result.get('page_age', ''),
-                                                    })
-                                        yield {
-                                            "event": "web_search_results",
-                                            "data": json.dumps({
-                                                "tool_use_id": block.get('tool_use_id'),
-                                                "sources": sources,
-                                                "source_count": len(sources),
-                                            }),
-                                        }
-                        except (ValueError, TypeError):
-                            pass
+                    # Check for web search blocks in assistant messages. Text blocks
+                    # are skipped here as they'll be in the final response.
+                    if role == 'assistant' and _is_block_content(content):
+                        for event in _assistant_block_events(content, _FINAL_POLL_BLOCK_TYPES):
+                            yield event
             except Exception as e:
                 logger.warning(f"Final poll failed: {e}")
 
             # Check result
-            if result_container['error']:
-                yield {
-                    "event": "error",
-                    "data": json.dumps({
-                        "message": result_container['error'],
-                        "error_type": "Exception",
-                        "suggestion": "Check the application logs for more details.",
-                    }),
-                }
-            elif result_container['response']:
-                response = result_container['response']
+            send_error = send_future.exception()
+            if send_error:
+                logger.error(f"Error in send_message: {send_error}")
+                logger.error(f"Traceback: {''.join(traceback.format_exception(send_error))}")
+                yield _encode_event("error", {
+                    "message": str(send_error),
+                    "error_type": "Exception",
+                    "suggestion": "Check the application logs for more details.",
+                })
+            elif send_future.result():
+                response = send_future.result()
 
                 # Check if response is a structured error (dict with _error flag)
                 if isinstance(response, dict) and response.get('_error'):
-                    yield {
-                        "event": "error",
-                        "data": json.dumps({
-                            "message": response.get('error_message', 'An error occurred'),
-                            "error_type": response.get('error_type', 'Unknown'),
-                            "error_code": response.get('error_code', 'Unknown'),
-                            "suggestion": response.get('suggestion', ''),
-                            "retries_attempted": response.get('retries_attempted', 0),
-                        }),
-                    }
+                    yield _structured_error_event(response)
                 else:
                     # Emit final response
-                    yield {
-                        "event": "response",
-                        "data": json.dumps({
-                            "type": "text",
-                            "content": response,
-                            "final": True,
-                        }),
-                    }
+                    yield _encode_event("response", {
+                        "type": "text",
+                        "content": response,
+                        "final": True,
+                    })
 
                     # Send completion event
-                    yield {
-                        "event": "complete",
-                        "data": json.dumps({
-                            "status": "success",
-                        }),
-                    }
+                    yield _encode_event("complete", {
+                        "status": "success",
+                    })
             else:
-                yield {
-                    "event": "error",
-                    "data": json.dumps({
-                        "message": "No response received from the model",
-                        "error_type": "NoResponse",
-                        "suggestion": "The model did not respond. Try again or check your connection.",
-                    }),
-                }
+                yield _encode_event("error", {
+                    "message": "No response received from the model",
+                    "error_type": "NoResponse",
+                    "suggestion": "The model did not respond. Try again or check your connection.",
+                })
 
         except Exception as e:
             logger.error(f"Error in stream_chat_response: {e}")
-            yield {
-                "event": "error",
-                "data": json.dumps({
-                    "message": str(e),
-                }),
-            }
+            yield _encode_event("error", {
+                "message": str(e),
+            })
 
     async def stream_tool_execution(
         self,
@@ -403,20 +663,18 @@ class StreamingManager:
             # Send start event
             yield {
                 "event": "tool_start",
-                "data": json.dumps({
+                "data": _dumps({
                     "tool_name": tool_name,
                     "input": tool_input,
                 }),
             }
 
-            # Simulate tool execution
             # In actual implementation, this would integrate with MCP manager
-            await asyncio.sleep(0.5)
 
             # Send completion event
             yield {
                 "event": "tool_complete",
-                "data": json.dumps({
+                "data": _dumps({
                     "tool_name": tool_name,
                     "status": "success",
                 }),
@@ -426,7 +684,7 @@ class StreamingManager:
             logger.error(f"Error in stream_tool_execution: {e}")
             yield {
                 "event": "tool_error",
-                "data": json.dumps({
+                "data": _dumps({
                     "tool_name": tool_name,
                     "error": str(e),
                 }),
@@ -448,23 +706,24 @@ class StreamingManager:
             Dictionary events for SSE streaming
         """
         try:
+            # Only step and percentage vary, so encode the rest of the payload once
+            template = '{"task":%s,"step":%%d,"total":%d,"percentage":%%d}' % (
+                _dumps(task_name).replace('%', '%%'), total_steps,
+            )
             for step in range(total_steps + 1):
+                percentage = step * 100 // total_steps if total_steps > 0 else 100
                 yield {
                     "event": "progress",
-                    "data": json.dumps({
-                        "task": task_name,
-                        "step": step,
-                        "total": total_steps,
-                        "percentage": int((step / total_steps) * 100) if total_steps > 0 else 100,
-                    }),
+                    "data": template % (step, percentage),
                 }
-                await asyncio.sleep(0.1)
+                # Yield to the event loop without introducing artificial delay
+                await asyncio.sleep(0)
 
         except Exception as e:
             logger.error(f"Error in stream_progress: {e}")
             yield {
                 "event": "error",
-                "data": json.dumps({
+                "data": _dumps({
                     "message": str(e),
                 }),
             }
@@ -499,14 +758,23 @@ async def stream_chat(
     app_instance = request.app.state.app_instance
     conversation_manager = app_instance.conversation_manager
 
-    # Load conversation and set model with proper provider routing
-    conversation_manager.load_conversation(conversation_id)
+    # Load conversation if needed (it is usually already loaded by the chat page)
+    if conversation_manager.current_conversation_id != conversation_id:
+        conversation_manager.load_conversation(conversation_id)
+
+    # Set model with proper provider routing, skipping the provider model search
+    # when the active service is already using the conversation's model
     conv = app_instance.database.get_conversation(conversation_id)
     if conv:
-        app_instance.llm_manager.set_model(conv['model_id'])
+        llm_manager = app_instance.llm_manager
+        active_service = llm_manager.get_active_service()
+        if getattr(active_service, 'current_model_id', None) != conv['model_id']:
+            llm_manager.set_model(conv['model_id'])
+            active_service = llm_manager.get_active_service()
         # Update service references so conversation manager uses the correct provider
-        app_instance.bedrock_service = app_instance.llm_manager.get_active_service()
-        conversation_manager.update_service(app_instance.bedrock_service)
+        if conversation_manager.bedrock_service is not active_service:
+            app_instance.bedrock_service = active_service
+            conversation_manager.update_service(active_service)
 
     # Set per-request web search toggle
     conversation_manager.set_web_search_active(web_search_active)
@@ -516,10 +784,27 @@ async def stream_chat(
         async for event in streaming_manager.stream_chat_response(
             conversation_manager=conversation_manager,
             message=message,
+            executor=request.app.state.chat_executor,
         ):
             yield event
 
-    return EventSourceResponse(event_generator())
+    return EventSourceResponse(event_generator(), ping=_PING_INTERVAL)
+
+
+@router.get("/stream/metrics")
+async def stream_metrics(
+    session_id: Annotated[str, Depends(get_current_session)],
+) -> StreamMetrics:
+    """
+    Get chat stream admission metrics.
+
+    Args:
+        session_id: Validated session ID from dependency
+
+    Returns:
+        StreamMetrics with active, waiting and maximum stream counts
+    """
+    return StreamMetrics(**streaming_manager.get_metrics())
 
 
 @router.get("/stream/tool")
@@ -13,6 +13,7 @@ import time
 import webbrowser
 import signal
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Annotated, Optional
 from pathlib import Path
 
@@ -317,6 +318,7 @@ def create_app(
     heartbeat_enabled = _hb_settings.get('interface.web.browser_heartbeat.enabled', True)
     heartbeat_interval = _hb_settings.get('interface.web.browser_heartbeat.interval_seconds', 15)
     heartbeat_timeout = _hb_settings.get('interface.web.browser_heartbeat.timeout_seconds', 60)
+    max_concurrent_streams = _hb_settings.get('interface.web.max_concurrent_streams', 4)
 
     # Add global template variables for app name and version
     templates.env.globals['app_name'] = full_name()
@@ -340,6 +342,18 @@ def create_app(
     app.state.cost_tracking_enabled = cost_tracking_enabled
     app.state.new_conversations_allowed = new_conversations_allowed
 
+    # Limit concurrent chat responses and size the executor for their blocking model calls
+    from .endpoints.streaming import streaming_manager
+    streaming_manager.set_max_concurrent_streams(max_concurrent_streams)
+    app.state.chat_executor = ThreadPoolExecutor(
+        max_workers=streaming_manager.max_concurrent_streams, thread_name_prefix='chat-'
+    )
+
+    @app.on_event("shutdown")
+    async def shutdown_chat_executor():
+        """Release chat executor threads on shutdown."""
+        app.state.chat_executor.shutdown(wait=False, cancel_futures=True)
+
     # Session dependency
     async def get_session(session_id: Optional[str] = Cookie(default=None)) -> str:
         """
@@ -0,0 +1,113 @@
+"""
+Unit tests for database message retrieval.
+
+Tests the incremental message query used by the chat streaming endpoint.
+
+"""
+
+import sqlite3
+
+import pytest
+
+from dtSpark.database import conversations, messages, schema
+
+
+USER_GUID = 'test-user'
+
+
+@pytest.fixture
+def conn():
+    """Provide an in-memory database with the Spark schema."""
+    connection = sqlite3.connect(':memory:')
+    connection.row_factory = sqlite3.Row
+    schema.initialise_schema(connection)
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def conversation_id(conn):
+    """Create a conversation to add messages to."""
+    return conversations.create_conversation(conn, 'Test', 'test-model', user_guid=USER_GUID)
+
+
+class TestConversationMessagesAfter:
+    """Test cases for get_conversation_messages_after."""
+
+    def test_returns_all_messages_from_zero(self, conn, conversation_id):
+        """Test that a last message ID of zero returns every message."""
+        messages.add_message(conn, conversation_id, 'user', 'Hello', 1, user_guid=USER_GUID)
+        messages.add_message(conn, conversation_id, 'assistant', 'Hi there', 2, user_guid=USER_GUID)
+
+        result = messages.get_conversation_messages_after(conn, conversation_id, 0,
+                                                          user_guid=USER_GUID)
+
+        assert [msg['content'] for msg in result] == ['Hello', 'Hi there']
+
+    def test_returns_only_new_messages(self, conn, conversation_id):
+        """Test that only messages after the given ID are returned."""
+        first_id = messages.add_message(conn, conversation_id, 'user', 'Hello', 1,
+                                        user_guid=USER_GUID)
+        second_id = messages.add_message(conn, conversation_id, 'assistant', 'Hi there', 2,
+                                         user_guid=USER_GUID)
+
+        result = messages.get_conversation_messages_after(conn, conversation_id, first_id,
+                                                          user_guid=USER_GUID)
+
+        assert len(result) == 1
+        assert result[0]['id'] == second_id
+        assert result[0]['role'] == 'assistant'
+        assert messages.get_conversation_messages_after(conn, conversation_id, second_id,
+                                                        user_guid=USER_GUID) == []
+
+    def test_excludes_other_conversations(self, conn, conversation_id):
+        """Test that messages from other conversations are not returned."""
+        other_id = conversations.create_conversation(conn, 'Other', 'test-model',
+                                                     user_guid=USER_GUID)
+        messages.add_message(conn, other_id, 'user', 'Elsewhere', 1, user_guid=USER_GUID)
+
+        assert messages.get_conversation_messages_after(conn, conversation_id, 0,
+                                                        user_guid=USER_GUID) == []
+
+    def test_excludes_rolled_up_messages(self, conn, conversation_id):
+        """Test that rolled-up messages are not returned."""
+        message_id = messages.add_message(conn, conversation_id, 'user', 'Hello', 1,
+                                          user_guid=USER_GUID)
+        messages.mark_messages_as_rolled_up(conn, [message_id], user_guid=USER_GUID)
+
+        assert messages.get_conversation_messages_after(conn, conversation_id, 0,
+                                                        user_guid=USER_GUID) == []
+
+
+class TestLatestMessageId:
+    """Test cases for get_latest_message_id."""
+
+    def test_empty_conversation(self, conn, conversation_id):
+        """Test that a conversation without messages reports zero."""
+        assert messages.get_latest_message_id(conn, conversation_id, user_guid=USER_GUID) == 0
+
+    def test_includes_rolled_up_messages(self, conn, conversation_id):
+        """Test that the latest ID counts rolled-up messages as already seen."""
+        messages.add_message(conn, conversation_id, 'user', 'Hello', 1, user_guid=USER_GUID)
+        last_id = messages.add_message(conn, conversation_id, 'assistant', 'Hi', 1,
+                                       user_guid=USER_GUID)
+        messages.mark_messages_as_rolled_up(conn, [last_id], user_guid=USER_GUID)
+
+        assert messages.get_latest_message_id(conn, conversation_id,
+                                              user_guid=USER_GUID) == last_id
+
+
+class TestMessageIndices:
+    """Test cases for the indices on the messages table."""
+
+    def test_single_column_index_replaced(self, conn):
+        """Test that re-initialising replaces the old conversation index with the composite one."""
+        conn.execute('CREATE INDEX idx_messages_conversation ON messages(conversation_id)')
+        schema.initialise_schema(conn)
+
+        indices = {row['name'] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'messages'"
+        )}
+
+        assert 'idx_messages_conversation_id' in indices
+        assert 'idx_messages_conversation' not in indices
@@ -8,24 +8,34 @@ in the conversation history when using Google Gemini.
 import sys
 import os
 
+import pytest
+
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+types = pytest.importorskip("google.genai.types")
+
+from dtSpark.llm.google_gemini import GoogleGeminiService, _tool_cache  # noqa: E402
 
-def test_message_conversion_with_tools():
-    """Test that tool_use and tool_result blocks are properly converted to Gemini format."""
-    try:
-        from dtSpark.llm.google_gemini import GoogleGeminiService
-    except ImportError:
-        print("SKIP: google-genai package not installed")
-        return
 
-    # Create service with dummy key for testing message conversion
+def _create_service():
+    """Create a service instance for testing without an API client."""
     # Note: This doesn't make actual API calls
     service = GoogleGeminiService.__new__(GoogleGeminiService)
     service.api_key = "test-key"
     service.current_model_id = "gemini-2.0-flash"
+    return service
+
+
+@pytest.fixture
+def service():
+    """Fresh service instance per test, with the shared tool cache emptied."""
+    _tool_cache.clear()
+    return _create_service()
 
+
+def test_message_conversion_with_tools(service):
+    """Test that tool_use and tool_result blocks are properly converted to Gemini format."""
     # Simulate conversation history with tool calls (Bedrock/standard format)
     messages = [
         {
@@ -96,6 +106,34 @@ def test_message_conversion_with_tools():
     has_function_response = any('function_response' in part for part in gemini_messages[2]['parts'])
     assert has_function_response, "Tool result should have function_response"
 
+    follow_up = messages + [{'role': 'assistant', 'content': 'It is 15:24 UTC.'}]
+
+    # The system instruction is normalised the same way on every turn
+    prompt_parts = ['You are a helpful assistant.  ', 'Answer briefly.', '']
+    _, system_a = service._convert_messages_to_gemini_format(messages, '\n'.join(prompt_parts))
+    _, system_b = service._convert_messages_to_gemini_format(follow_up, '\n'.join(prompt_parts))
+    assert system_a == 'You are a helpful assistant.\nAnswer briefly.'
+    assert system_a == system_b, "Identical system prompts should be sent identically"
+
+    # A long block list converts every supported block in order and skips provider-specific ones
+    synthetic_blocks = []
+    for i in range(125):
+        synthetic_blocks.extend([
+            {'type': 'text', 'text': f'step {i}'},
+            {'type': 'tool_use', 'id': f'tool_{i}', 'name': f'tool_{i % 5}', 'input': {'i': i}},
+            {'type': 'tool_result', 'tool_use_id': f'tool_{i}', 'content': [{'type': 'text', 'text': str(i)}]},
+            {'type': 'server_tool_use', 'id': f'srv_{i}', 'name': 'web_search'},
+        ])
+    assert len(synthetic_blocks) == 500
+    synthetic, _ = service._convert_messages_to_gemini_format(
+        [{'role': 'assistant', 'content': synthetic_blocks}]
+    )
+    synthetic_parts = synthetic[0]['parts']
+    assert len(synthetic_parts) == 375
+    assert synthetic_parts[0] == {'text': 'step 0'}
+    assert synthetic_parts[1]['function_call'] == {'name': 'tool_0', 'args': {'i': 0}}
+    assert synthetic_parts[-1]['function_response'] == {'name': 'tool_4', 'response': {'result': '124'}}
+
     print("\n[OK] All assertions passed!")
     print("\nConclusion:")
     print("- Tool calls are converted to Gemini 'function_call' format")
@@ -104,19 +142,8 @@ def test_message_conversion_with_tools():
     print("- Message structure matches Gemini API expectations")
 
 
-def test_tool_definition_conversion():
+def test_tool_definition_conversion(service):
     """Test that tool definitions are properly converted to Gemini format."""
-    try:
-        from dtSpark.llm.google_gemini import GoogleGeminiService
-        from google.genai import types
-    except ImportError:
-        print("SKIP: google-genai package not installed")
-        return
-
-    # Create service instance for testing
-    service = GoogleGeminiService.__new__(GoogleGeminiService)
-    service.api_key = "test-key"
-
     # Standard tool definition format (Bedrock/MCP style)
     tools = [
         {
@@ -161,6 +188,17 @@ def test_tool_definition_conversion():
     tool = gemini_tools[0]
     assert hasattr(tool, 'function_declarations') or isinstance(tool, types.Tool)
 
+    # Identical tool definitions reuse the previously built Tool object
+    gemini_tools2 = service._convert_tools_to_gemini_format(tools)
+    assert gemini_tools2 is not gemini_tools
+    assert gemini_tools[0] is gemini_tools2[0], "Repeat conversion should return the cached Tool"
+
+    # Key order does not affect the lookup, but a changed definition is converted afresh
+    reordered = [dict(reversed(list(t.items()))) for t in tools]
+    assert service._convert_tools_to_gemini_format(reordered)[0] is gemini_tools[0]
+    renamed = [tools[0], dict(tools[1], name='evaluate')]
+    assert service._convert_tools_to_gemini_format(renamed)[0] is not gemini_tools[0]
+
     print("\n[OK] Tool conversion assertions passed!")
     print("\nConclusion:")
     print("- Multiple tool definitions are combined into a single Tool object")
@@ -168,19 +206,8 @@ def test_tool_definition_conversion():
     print("- inputSchema and input_schema keys are both handled")
 
 
-def test_response_processing():
+def test_response_processing(service):
     """Test that Gemini responses are properly processed to standard format."""
-    try:
-        from dtSpark.llm.google_gemini import GoogleGeminiService
-    except ImportError:
-        print("SKIP: google-genai package not installed")
-        return
-
-    # Create service instance for testing
-    service = GoogleGeminiService.__new__(GoogleGeminiService)
-    service.api_key = "test-key"
-    service.current_model_id = "gemini-2.0-flash"
-
     # Create a mock response object
     class MockPart:
         def __init__(self, text=None, function_call=None):
@@ -259,6 +286,78 @@ def test_response_processing():
 
     print("[OK] Function call response processing passed!")
 
+    # Test 3: Multi-part response mixing text and function calls keeps part order
+    mixed_parts = [
+        MockPart(function_call=MockFunctionCall(name=f'tool_{i}', args={'i': i})) if i % 4 == 3
+        else MockPart(text=f'chunk {i} ')
+        for i in range(32)
+    ]
+    mixed_response = MockResponse(
+        candidates=[MockCandidate(content=MockContent(parts=mixed_parts))],
+        usage=MockUsage()
+    )
+
+    result = service._process_response(mixed_response)
+
+    assert len(result['content_blocks']) == 32
+    for i, block in enumerate(result['content_blocks']):
+        if i % 4 == 3:
+            assert block['type'] == 'tool_use' and block['name'] == f'tool_{i}'
+        else:
+            assert block == {'type': 'text', 'text': f'chunk {i} '}
+    assert [block['name'] for block in result['tool_use']] == [f'tool_{i}' for i in range(3, 32, 4)]
+    assert result['content'] == ''.join(f'chunk {i} ' for i in range(32) if i % 4 != 3)
+    assert result['stop_reason'] == 'tool_use'
+
+    print("[OK] Multi-part response processing passed!")
+
+    # A part carrying both text and a function call yields a block for each
+    combined_response = MockResponse(
+        candidates=[MockCandidate(content=MockContent(parts=[
+            MockPart(text='Checking. ', function_call=MockFunctionCall(name='get_current_time', args={}))
+        ]))],
+        usage=MockUsage()
+    )
+
+    result = service._process_response(combined_response)
+
+    assert [block['type'] for block in result['content_blocks']] == ['text', 'tool_use']
+    assert result['content'] == 'Checking. '
+    assert result['tool_use'][0]['name'] == 'get_current_time'
+
+    print("[OK] Combined text and function call part processing passed!")
+
+    # Test 4: Genuine SDK response object
+    sdk_response = types.GenerateContentResponse(
+        candidates=[
+            types.Candidate(
+                content=types.Content(role='model', parts=[
+                    types.Part(text='Checking the time.'),
+                    types.Part(
+                        function_call=types.FunctionCall(name='get_current_time', args={'timezone': 'UTC'}),
+                        thought_signature=b'signature'
+                    )
+                ]),
+                finish_reason='STOP'
+            )
+        ],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=12,
+            candidates_token_count=7
+        )
+    )
+
+    result = service._process_response(sdk_response)
+
+    assert result['content'] == 'Checking the time.'
+    assert result['stop_reason'] == 'tool_use'
+    assert result['usage'] == {'input_tokens': 12, 'output_tokens': 7}
+    assert [block['type'] for block in result['content_blocks']] == ['text', 'tool_use']
+    assert result['tool_use'][0]['input'] == {'timezone': 'UTC'}
+    assert result['tool_use'][0]['thought_signature'] == 'c2lnbmF0dXJl'
+
+    print("[OK] SDK response processing passed!")
+
     print("\n[OK] All response processing assertions passed!")
     print("\nConclusion:")
     print("- Text responses are properly extracted")
@@ -267,21 +366,120 @@ def test_response_processing():
     print("- Stop reasons are properly mapped")
 
 
+def test_model_list_caching(service):
+    """Test that the model list is fetched once and reused within the cache TTL."""
+    class MockModel:
+        def __init__(self, name, display_name):
+            self.name = name
+            self.display_name = display_name
+
+    class MockModels:
+        def __init__(self):
+            self.calls = 0
+
+        def list(self):
+            self.calls += 1
+            return [
+                MockModel('models/gemini-2.0-flash', 'Gemini 2.0 Flash'),
+                MockModel('models/text-embedding-004', 'Text Embedding 004'),
+            ]
+
+    class MockClient:
+        def __init__(self):
+            self.models = MockModels()
+
+    service.client = MockClient()
+    service._models_cache = None
+
+    models = service.list_available_models()
+    assert [m['id'] for m in models] == ['models/gemini-2.0-flash']
+
+    assert service.list_available_models() is models, "Second listing should be served from cache"
+    assert service.client.models.calls == 1
+
+    # An expired entry triggers a fresh fetch
+    service._models_cache = (service._models_cache[0] - 3600, models)
+    refreshed = service.list_available_models()
+    assert refreshed is not models
+    assert service.client.models.calls == 2
+
+    print("[OK] Model list caching assertions passed!")
+
+
+def test_streaming_invocation(service):
+    """Test that streamed responses yield text deltas followed by the aggregated response."""
+    def chunk(parts, finish_reason=None, output_tokens=None):
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(
+                content=types.Content(role='model', parts=parts),
+                finish_reason=finish_reason
+            )],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=20,
+                candidates_token_count=output_tokens
+            )
+        )
+
+    class MockModels:
+        def generate_content_stream(self, model, contents, config):
+            assert contents == [{'role': 'user', 'parts': [{'text': 'What time is it?'}]}]
+            yield chunk([types.Part(text='Let me ')])
+            yield chunk([types.Part(text='check.')])
+            yield chunk(
+                [types.Part(function_call=types.FunctionCall(name='get_current_time', args={}))],
+                finish_reason='STOP',
+                output_tokens=9
+            )
+
+    class MockClient:
+        def __init__(self):
+            self.models = MockModels()
+
+    service.client = MockClient()
+    service.default_max_tokens = 8192
+    service.rate_limit_max_retries = 1
+    service.rate_limit_base_delay = 2.0
+
+    events = list(service.invoke_model_stream(
+        [{'role': 'user', 'content': 'What time is it?'}], max_tokens=100
+    ))
+
+    assert events[:2] == [{'delta': 'Let me '}, {'delta': 'check.'}]
+    assert len(events) == 3
+    result = events[2]['response']
+    assert result['content'] == 'Let me check.'
+    assert [block['type'] for block in result['content_blocks']] == ['text', 'tool_use']
+    assert result['content_blocks'][0]['text'] == 'Let me check.'
+    assert result['tool_use'][0]['name'] == 'get_current_time'
+    assert result['stop_reason'] == 'tool_use'
+    assert result['usage'] == {'input_tokens': 20, 'output_tokens': 9}
+
+    print("[OK] Streaming invocation assertions passed!")
+
+
 if __name__ == '__main__':
     print("Testing Google Gemini message and tool conversion...")
     print("=" * 80)
 
     print("\n1. Testing message conversion with tools...")
     print("-" * 40)
-    test_message_conversion_with_tools()
+    test_message_conversion_with_tools(_create_service())
 
     print("\n2. Testing tool definition conversion...")
     print("-" * 40)
-    test_tool_definition_conversion()
+    test_tool_definition_conversion(_create_service())
 
     print("\n3. Testing response processing...")
     print("-" * 40)
-    test_response_processing()
+    test_response_processing(_create_service())
+
+    print("\n4. Testing model list caching...")
+    print("-" * 40)
+    test_model_list_caching(_create_service())
+
+    print("\n5. Testing streaming invocation...")
+    print("-" * 40)
+    test_streaming_invocation(_create_service())
 
     print("\n" + "=" * 80)
     print("All Google Gemini context tests completed!")
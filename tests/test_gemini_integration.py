@@ -9,6 +9,7 @@ Requirements:
 - GEMINI_API_KEY or GOOGLE_API_KEY environment variable set
 """
 
+import importlib.util
 import sys
 import os
 
@@ -22,13 +23,17 @@ def main():
     print("=" * 60)
 
     # Check for google-genai package
+    # Check availability without importing the SDK; the service imports it once.
+    # find_spec imports the parent package, so a missing 'google' raises here
     try:
-        import google.genai
-        print("[OK] google-genai package is installed")
-    except ImportError:
+        genai_spec = importlib.util.find_spec("google.genai")
+    except ModuleNotFoundError:
+        genai_spec = None
+    if genai_spec is None:
         print("[SKIP] google-genai package not installed")
         print("Install with: pip install google-genai")
         return False
+    print("[OK] google-genai package is installed")
 
     # Check for API key
     api_key = os.environ.get('GEMINI_API_KEY') or os.environ.get('GOOGLE_API_KEY')
@@ -58,6 +63,9 @@ def main():
         models = service.list_available_models()
         print(f"[OK] Found {len(models)} models")
 
+        assert service.list_available_models() is models, "Model list should be cached"
+        print("[OK] Repeat listing served from cache")
+
         if models:
             print("\nAvailable models:")
             for model in models[:10]:  # Show first 10
@@ -0,0 +1,299 @@
+"""
+Unit tests for the web SSE streaming helpers.
+
+Tests the construction of Server-Sent Events by the streaming endpoints.
+
+"""
+
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dtSpark.web.endpoints.streaming import (
+    _FINAL_POLL_BLOCK_TYPES,
+    StreamingManager,
+    _RecentKeys,
+    _assistant_block_events,
+    _encode_event,
+    _is_block_content,
+    _structured_error_event,
+    _text_event,
+)
+
+
+def parse_frame(frame):
+    """Split an encoded SSE frame into its event name and decoded data."""
+    assert frame.endswith(b'\r\n\r\n')
+    event_line, data_line = frame.decode('utf-8')[:-4].split('\r\n')
+    assert event_line.startswith('event: ') and data_line.startswith('data: ')
+    return event_line[len('event: '):], json.loads(data_line[len('data: '):])
+
+
+BLOCKS = [
+    {'type': 'text', 'text': 'Searching now'},
+    {'type': 'tool_use', 'name': 'get_time', 'input': {'timezone': 'UTC'}},
+    {'type': 'server_tool_use', 'id': 'srv_1', 'input': {'query': 'spark'}},
+    {
+        'type': 'web_search_tool_result',
+        'tool_use_id': 'srv_1',
+        'content': [
+            {'type': 'web_search_result', 'url': 'https://example.com', 'title': 'Example'},
+            {'type': 'other'},
+        ],
+    },
+]
+
+
+class TestAssistantBlockEvents:
+    """Test cases for _assistant_block_events."""
+
+    def test_emits_event_per_block(self):
+        """Test that each known block type produces its event."""
+        events = [parse_frame(frame) for frame in _assistant_block_events(json.dumps(BLOCKS))]
+
+        assert [event for event, _ in events] == [
+            'response', 'tool_start', 'web_search_start', 'web_search_results',
+        ]
+        assert events[0][1] == {'type': 'text', 'content': 'Searching now', 'final': False}
+        assert events[1][1] == {'tool_name': 'get_time', 'input': {'timezone': 'UTC'}}
+        assert events[2][1]['tool_name'] == 'web_search'
+        assert events[3][1] == {
+            'tool_use_id': 'srv_1',
+            'sources': [{'url': 'https://example.com', 'title': 'Example', 'page_age': ''}],
+            'source_count': 1,
+        }
+
+    def test_filters_block_types(self):
+        """Test that only the requested block types are emitted."""
+        frames = _assistant_block_events(json.dumps(BLOCKS), _FINAL_POLL_BLOCK_TYPES)
+
+        assert [parse_frame(frame)[0] for frame in frames] == [
+            'web_search_start', 'web_search_results',
+        ]
+
+    def test_skips_empty_text_and_unknown_blocks(self):
+        """Test that empty text and unknown block types produce no events."""
+        content = json.dumps([{'type': 'text', 'text': ''}, {'type': 'thinking'}, 'stray'])
+
+        assert _assistant_block_events(content) == []
+
+    def test_ignores_non_block_content(self):
+        """Test that content which is not a JSON list of blocks is ignored."""
+        assert _assistant_block_events('[not json') == []
+        assert _assistant_block_events('{"type": "text"}') == []
+
+
+class TestEncodeEvent:
+    """Test cases for _encode_event."""
+
+    def test_encodes_single_data_line(self):
+        """Test that payloads containing line breaks stay on one data line."""
+        frame = _encode_event('response', {'content': 'line one\nline two\r\n', 'final': False})
+
+        assert frame.count(b'\n') == 3
+        assert parse_frame(frame) == (
+            'response', {'content': 'line one\nline two\r\n', 'final': False},
+        )
+
+    def test_encodes_unicode(self):
+        """Test that non-ASCII content survives encoding."""
+        assert parse_frame(_encode_event('response', {'content': 'café ✓'})) == (
+            'response', {'content': 'café ✓'},
+        )
+
+
+class TestTextEvent:
+    """Test cases for _text_event."""
+
+    def test_matches_generic_encoding(self):
+        """Test that the text fast path produces the same event as the generic path."""
+        text = 'Quote "this"\nand 100% of ✓'
+
+        assert parse_frame(_text_event(text)) == parse_frame(
+            _encode_event('response', {'type': 'text', 'content': text, 'final': False})
+        )
+
+
+class TestStructuredErrorEvent:
+    """Test cases for _structured_error_event."""
+
+    def test_encodes_all_fields(self):
+        """Test that every field of the structured error is encoded."""
+        frame = _structured_error_event({
+            '_error': True,
+            'error_message': 'Rate "limit" exceeded',
+            'error_type': 'ThrottlingException',
+            'error_code': 'Throttling',
+            'suggestion': 'Wait and retry',
+            'retries_attempted': 3,
+        })
+
+        assert parse_frame(frame) == ('error', {
+            'message': 'Rate "limit" exceeded',
+            'error_type': 'ThrottlingException',
+            'error_code': 'Throttling',
+            'suggestion': 'Wait and retry',
+            'retries_attempted': 3,
+        })
+
+    def test_applies_defaults(self):
+        """Test that missing fields fall back to their defaults."""
+        assert parse_frame(_structured_error_event({'_error': True})) == ('error', {
+            'message': 'An error occurred',
+            'error_type': 'Unknown',
+            'error_code': 'Unknown',
+            'suggestion': '',
+            'retries_attempted': 0,
+        })
+
+
+class TestIsBlockContent:
+    """Test cases for _is_block_content."""
+
+    def test_detects_block_lists(self):
+        """Test that JSON lists are detected, including with leading whitespace."""
+        assert _is_block_content('[{"type": "text"}]') is True
+        assert _is_block_content('\n  [{"type": "text"}]') is True
+
+    def test_rejects_other_content(self):
+        """Test that plain text and empty content are rejected."""
+        assert _is_block_content('Hello [world]') is False
+        assert _is_block_content('   ') is False
+        assert _is_block_content('') is False
+
+
+class TestRecentKeys:
+    """Test cases for _RecentKeys."""
+
+    def test_add_reports_new_keys(self):
+        """Test that add returns True only the first time a key is seen."""
+        keys = _RecentKeys()
+
+        assert keys.add(('permission', 'r1')) is True
+        assert keys.add(('permission', 'r1')) is False
+        assert keys.add(('conflict', 'r1')) is True
+        assert ('permission', 'r1') in keys
+
+    def test_evicts_oldest_key_when_full(self):
+        """Test that the set never grows beyond its maximum length."""
+        keys = _RecentKeys(maxlen=2)
+        for key in ('a', 'b', 'c'):
+            keys.add(key)
+
+        assert len(keys) == 2
+        assert 'a' not in keys
+        assert 'b' in keys and 'c' in keys
+
+
+class TestStreamProgress:
+    """Test cases for StreamingManager.stream_progress."""
+
+    @staticmethod
+    def _collect(task_name, total_steps):
+        async def collect():
+            manager = StreamingManager()
+            return [event async for event in manager.stream_progress(task_name, total_steps)]
+        return asyncio.run(collect())
+
+    def test_emits_each_step(self):
+        """Test that a progress event is emitted for every step."""
+        events = self._collect('Indexing "docs" 100%', 3)
+
+        assert [json.loads(event['data']) for event in events] == [
+            {'task': 'Indexing "docs" 100%', 'step': step, 'total': 3, 'percentage': percentage}
+            for step, percentage in ((0, 0), (1, 33), (2, 66), (3, 100))
+        ]
+
+    def test_zero_steps_is_complete(self):
+        """Test that a task with no steps reports completion."""
+        events = self._collect('Empty', 0)
+
+        assert json.loads(events[0]['data'])['percentage'] == 100
+
+
+class TestChatStreamAdmission:
+    """Test cases for StreamingManager chat stream admission control."""
+
+    def test_waits_for_free_slot(self):
+        """Test that streams beyond the limit wait until a slot is released."""
+        async def scenario():
+            manager = StreamingManager(max_concurrent_streams=1)
+            await manager._acquire_chat_slot()
+
+            waiter = asyncio.create_task(manager._acquire_chat_slot())
+            await asyncio.sleep(0)
+            blocked = manager.get_metrics()
+
+            await manager._release_chat_slot()
+            await asyncio.wait_for(waiter, timeout=1)
+            return blocked, manager.get_metrics()
+
+        blocked, admitted = asyncio.run(scenario())
+
+        assert blocked == {'active_streams': 1, 'waiting_streams': 1, 'max_concurrent_streams': 1}
+        assert admitted == {'active_streams': 1, 'waiting_streams': 0, 'max_concurrent_streams': 1}
+
+    def test_disconnect_holds_slot_until_send_finishes(self):
+        """Test that a disconnected stream keeps its slot until its send has finished."""
+        release_first_send = threading.Event()
+        first_send_started = threading.Event()
+
+        class FakeDatabase:
+            def get_latest_message_id(self, conversation_id):
+                return 0
+
+            def get_conversation_messages_after(self, conversation_id, last_message_id):
+                return []
+
+        class FakeConversationManager:
+            current_conversation_id = 1
+            database = FakeDatabase()
+            web_interface = None
+
+            def send_message(self, message):
+                if message == 'first':
+                    first_send_started.set()
+                    release_first_send.wait(timeout=5)
+                return f'reply to {message}'
+
+        async def consume(manager, message, executor):
+            return [parse_frame(frame) async for frame in manager.stream_chat_response(
+                FakeConversationManager(), message, executor)]
+
+        async def scenario():
+            manager = StreamingManager(max_concurrent_streams=1)
+            executor = ThreadPoolExecutor(max_workers=1)
+            try:
+                first = asyncio.create_task(consume(manager, 'first', executor))
+                await asyncio.to_thread(first_send_started.wait, 5)
+
+                # The client disconnects while its send is still blocked
+                first.cancel()
+                await asyncio.gather(first, return_exceptions=True)
+                after_disconnect = manager.get_metrics()
+
+                second = asyncio.create_task(consume(manager, 'second', executor))
+                await asyncio.sleep(0.05)
+                while_send_runs = manager.get_metrics()
+
+                release_first_send.set()
+                frames = await asyncio.wait_for(second, timeout=5)
+                return after_disconnect, while_send_runs, frames, manager.get_metrics()
+            finally:
+                release_first_send.set()
+                executor.shutdown(wait=True)
+
+        after_disconnect, while_send_runs, frames, finished = asyncio.run(scenario())
+
+        assert after_disconnect['active_streams'] == 1
+        assert while_send_runs == {'active_streams': 1, 'waiting_streams': 1, 'max_concurrent_streams': 1}
+        assert ('response', {'type': 'text', 'content': 'reply to second', 'final': True}) in frames
+        assert finished['active_streams'] == 0
+
+    def test_limit_is_at_least_one(self):
+        """Test that the concurrency limit cannot be set below one."""
+        manager = StreamingManager()
+        manager.set_max_concurrent_streams(0)
+
+        assert manager.max_concurrent_streams == 1